@@ -1,17 +1,31 @@
 import streamlit as st
 import os
-import base64
+import hashlib
 import json
+import math
 import time
 import tempfile
-import requests
-from mistralai import Mistral
+from functools import partial
 from pathlib import Path
-from langchain_community.llms import OpenAI
-from langchain.chat_models import ChatOpenAI
-from langchain.prompts import PromptTemplate
-from langchain.chains import LLMChain
-from gtts import gTTS
+from ocr_audio.artifact_store import ArtifactStore
+from ocr_audio.http_client import create_session
+from ocr_audio.job_manifest import TEXT_DIRNAME, JobManifest
+from ocr_audio.job_queue import DEFAULT_JOB_WORKERS, FINISHED_STATES, JobCancelled, JobQueue
+from ocr_audio.lazy_imports import lazy_import
+from ocr_audio.llm_resources import (COMBINE_TEMPLATE, LLM_MODEL, LLM_TEMPERATURE, QA_TEMPLATE, SUMMARY_TEMPLATE, OpenAIEmbedder,
+                                     StreamTimer, build_chain, build_llm, stream_chain)
+from ocr_audio.ocr_engine import DEFAULT_MAX_IN_FLIGHT, DEFAULT_PAGES_PER_MINUTE, DEFAULT_REQUESTS_PER_SECOND, OCR_MODEL, dispatch_ocr, run_ocr
+from ocr_audio.ocr_cache import OCRCache, make_key
+from ocr_audio import image_preprocess, offline_ocr
+from ocr_audio.pipeline import gtts_to_file, read_text, save_file
+from ocr_audio.rate_limiter import RateLimiter
+from ocr_audio.qa_cache import QACache
+from ocr_audio.retrieval import HashingEmbedder, document_hash, retrieve_context
+from ocr_audio.summarizer import SummaryCache, summarize, summarize_stream
+from ocr_audio import thumbnails
+from ocr_audio.tts_cache import TTSCache, make_audio_key
+from ocr_audio.tts_engine import DEFAULT_TTS_WORKERS, TTS_MODEL, TTSError, max_connections, synthesize, synthesize_stream
+from ocr_audio.uploads import delete_uploaded_file, file_to_data_uri, prepare_local_document
 
 st.set_page_config(layout="wide", page_title="OCR & Audio App", page_icon="🔊")
 
@@ -49,44 +63,165 @@ elif theme == "Light":
     )
 
 
-# Offline OCR Fallback (using pytesseract)
-try:
-    import pytesseract
-    from PIL import Image
-except ImportError:
-    pytesseract = None
+# Heavy SDKs are only imported when the feature using them runs, so a cold
+# start or rerun does not pay for them
+mistralai = lazy_import("mistralai")
 
-# Offline TTS Fallback (using gTTS)    
-try:
-    from gtts import gTTS
-except ImportError:
-    gTTS = None
+# Offline TTS Fallback (using gTTS)
+gtts = lazy_import("gtts")
+
+
+# Shared Mistral rate limiter, one per API key across all sessions and reruns
+@st.cache_resource
+def get_rate_limiter(api_key_hash, requests_per_second, pages_per_minute):
+    return RateLimiter(requests_per_second=requests_per_second, pages_per_minute=pages_per_minute)
+
+
+# Persistent OCR result cache living in the output folder
+@st.cache_resource
+def get_ocr_cache(folder_path):
+    return OCRCache(folder_path)
+
+
+# Persistent audio cache living in the output folder
+@st.cache_resource
+def get_tts_cache(folder_path):
+    return TTSCache(folder_path)
+
+
+# Embedding model for Q&A retrieval; the local one needs no API key
+@st.cache_resource
+def get_cached_embedder(api_key_hash, backend, _api_key):
+    if backend == "Local (offline)":
+        return HashingEmbedder()
+    return OpenAIEmbedder(_api_key)
+
+
+def get_embedder(api_key, backend):
+    return get_cached_embedder(hashlib.sha256(api_key.encode()).hexdigest(), backend, api_key)
+
+
+# Answers shared by all sessions, keyed by document and question
+@st.cache_resource
+def get_qa_cache():
+    return QACache()
+
+
+# Journal of OCR batches and per-document stage status in the output folder
+@st.cache_resource
+def get_job_manifest(folder_path):
+    return JobManifest(folder_path)
+
+
+# Persistent cache of chunk summaries living in the output folder
+@st.cache_resource
+def get_summary_cache(folder_path):
+    return SummaryCache(folder_path)
+
+
+# Keep-alive HTTP session for the TTS endpoint, reused across reruns. Every
+# job worker can run a synthesis on it at the same time, so the pool holds
+# all of their connections.
+@st.cache_resource
+def get_http_session(tts_workers):
+    return create_session(pool_size=max_connections(tts_workers) * DEFAULT_JOB_WORKERS)
+
+
+# Long-lived LLM clients and prompt chains keyed on API key hash, model and
+# temperature; the raw key is passed unhashed (leading underscore)
+@st.cache_resource
+def get_cached_llm(api_key_hash, model, temperature, _api_key):
+    return build_llm(_api_key, model=model, temperature=temperature)
+
+
+@st.cache_resource
+def get_cached_chain(api_key_hash, model, temperature, template, _api_key):
+    return build_chain(get_cached_llm(api_key_hash, model, temperature, _api_key), template)
+
+
+def get_chain(api_key, template, model=LLM_MODEL, temperature=LLM_TEMPERATURE):
+    api_key_hash = hashlib.sha256(api_key.encode()).hexdigest()
+    return get_cached_chain(api_key_hash, model, temperature, template, api_key)
+
+
+# Keep time-to-first-token and total time of every LLM call in this session
+def record_llm_timing(call, first_token_seconds, total_seconds):
+    st.session_state.setdefault("llm_timings", []).append({
+        "call": call,
+        "first_token_seconds": first_token_seconds,
+        "total_seconds": total_seconds
+    })
+    if first_token_seconds is None:
+        st.caption(f"Completed in {total_seconds:.2f}s")
+    else:
+        st.caption(f"First token after {first_token_seconds:.2f}s, completed in {total_seconds:.2f}s")
+
+
+# Render a token stream as it arrives and return the full text
+def write_timed_stream(call, pieces):
+    timer = StreamTimer(pieces)
+    text = st.write_stream(timer)
+    record_llm_timing(call, timer.first_token_seconds, timer.total_seconds or 0.0)
+    return text if isinstance(text, str) else "".join(str(piece) for piece in text)
+
+
+# Inline PDF preview for an artifact handle, used when thumbnails cannot be
+# rendered. Handles are content addressed, so the encoded preview is reused
+# across reruns; only two are kept, since each is a third larger than the
+# PDF and the cache holds it in memory for all sessions.
+@st.cache_data(max_entries=2, show_spinner=False)
+def get_pdf_data_uri(handle):
+    return file_to_data_uri(artifact_store.path(handle), "application/pdf")
+
+
+# Page count of an uploaded PDF, per content-addressed handle
+@st.cache_data(max_entries=256, show_spinner=False)
+def get_pdf_page_count(handle):
+    return offline_ocr.page_count(artifact_store.path(handle))
+
+
+# Download payloads, built when a download button is clicked and memoized
+# by content so repeat downloads of an unchanged text cost nothing
+@st.cache_data(max_entries=64, show_spinner=False)
+def json_payload(text):
+    return json.dumps({"ocr_result": text}, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def text_payload(text):
+    return text.encode("utf-8")
+
+
+# Audio stays on disk; session state only keeps its path
+def read_file_bytes(file_path):
+    with open(file_path, "rb") as f:
+        return f.read()
+
+
+# Disk-backed store for uploads and previews shared by all sessions;
+# session state only keeps handles into it
+@st.cache_resource
+def get_artifact_store():
+    return ArtifactStore()
+
+
+# Background workers for OCR batches and audio generation, shared by all
+# sessions so a job survives the reruns of the session that started it
+@st.cache_resource
+def get_job_queue():
+    return JobQueue(max_workers=DEFAULT_JOB_WORKERS)
+
+
+artifact_store = get_artifact_store()
+job_queue = get_job_queue()
+if "artifact_session" not in st.session_state:
+    st.session_state["artifact_session"] = artifact_store.open_session()
+session_id = st.session_state["artifact_session"].session_id
 
 
 # Create tabs for different functions - removed the Write Text tab
 tab1, tab2 = st.tabs(["OCR Text Extraction", "Text to Audio Conversion"])
 
-# Function to save file to a specified folder
-def save_file(content, filename, folder_path, file_type="binary"):
-    try:
-        # Create folder if it doesn't exist
-        os.makedirs(folder_path, exist_ok=True)
-        
-        # Full path for the file
-        file_path = os.path.join(folder_path, filename)
-        
-        # Write file content
-        if file_type == "text":
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
-        else:  # binary content
-            with open(file_path, 'wb') as f:
-                f.write(content)
-                
-        return True, file_path
-    except Exception as e:
-        return False, str(e)
-
 with tab1:
     st.title("OCR App")
     st.markdown("<h3 style='color: white;'>Extract text from images and PDFs</h3>", unsafe_allow_html=True)
@@ -99,14 +234,29 @@ with tab1:
     
     # 2 OPEN AI API Key Input
     openai_api_key = st.text_input("Enter your OpenAI API Key (for summarization)", type="password", key="openai_key_summary")
+    
+    # Embeddings used to pick the relevant parts of long texts for Q&A
+    embedding_backend = st.radio("Q&A retrieval embeddings", ("OpenAI", "Local (offline)"), horizontal=True,
+                                 help="Long texts are indexed once and only the most relevant chunks are sent with each question")
+    # Similar-question matching needs real embeddings; even then it can mistake
+    # "... in 2021?" for "... in 2022?", so it is opt-in
+    match_similar_questions = False
+    if embedding_backend == "OpenAI":
+        match_similar_questions = st.checkbox("Reuse answers for similar questions", value=False,
+                                              help="Questions close in meaning to an earlier one on the same text reuse its answer. "
+                                                   "Questions that differ only in a year, a number or a 'not' can be matched too.")
+    qa_cache = get_qa_cache()
+    
+    # Show summaries and answers token by token as they are generated
+    stream_responses = st.checkbox("Stream responses", value=True)
 
     # Initialize session state variables for persistence
     if "ocr_result" not in st.session_state:
         st.session_state["ocr_result"] = []
     if "preview_src" not in st.session_state:
         st.session_state["preview_src"] = []
-    if "image_bytes" not in st.session_state:
-        st.session_state["image_bytes"] = []
+    if "page_image_dirs" not in st.session_state:
+        st.session_state["page_image_dirs"] = []
 
     # Output folder setting
     output_folder = st.text_input("Output folder path for saved files", 
@@ -144,203 +294,444 @@ with tab1:
         uploaded_files = st.file_uploader("Upload one or more files", type=["pdf", "jpg", "jpeg", "png"], accept_multiple_files=True)
         input_url = ""
 
+    # Number of documents sent to Mistral at the same time
+    max_in_flight = st.slider("Max concurrent OCR requests", min_value=1, max_value=16, value=DEFAULT_MAX_IN_FLIGHT,
+                              help="Documents in a batch are processed in parallel up to this limit")
+
+    # Rate limit budget shared by every OCR request made with this API key
+    with st.expander("Rate limit settings"):
+        rl_col1, rl_col2 = st.columns(2)
+        with rl_col1:
+            requests_per_second = st.number_input("Requests per second", min_value=0.1, max_value=50.0,
+                                                  value=DEFAULT_REQUESTS_PER_SECOND, step=0.5)
+        with rl_col2:
+            pages_per_minute = st.number_input("Pages per minute", min_value=1, max_value=10000,
+                                               value=DEFAULT_PAGES_PER_MINUTE, step=50)
+        limiter = get_rate_limiter(hashlib.sha256(api_key.encode()).hexdigest(), float(requests_per_second), int(pages_per_minute))
+        st.json(limiter.state())
+
+    # Reuse results for documents that were already OCR'd with the same model
+    use_ocr_cache = st.checkbox("Reuse cached OCR results", value=True,
+                                help="Identical files and URLs are answered from a cache in the output folder")
+    ocr_cache = None
+    if use_ocr_cache:
+        try:
+            ocr_cache = get_ocr_cache(output_folder)
+            cache_stats = ocr_cache.stats()
+            st.caption(f"OCR cache: {cache_stats['entries']} entries, {cache_stats['hits']} hits, {cache_stats['misses']} misses")
+        except Exception as e:
+            st.warning(f"OCR cache unavailable: {e}")
+    
+    # Chunk summaries are cached so re-summarizing an edited text is cheap
+    try:
+        summary_cache = get_summary_cache(output_folder)
+    except Exception:
+        summary_cache = None
+
+    # Finished documents are journaled so an interrupted batch can be resumed
+    try:
+        job_manifest = get_job_manifest(output_folder)
+    except Exception as e:
+        job_manifest = None
+        st.warning(f"Job manifest unavailable: {e}")
+
+    # Embedded page images are only downloaded when asked for, and go to disk
+    extract_images = st.checkbox("Extract embedded page images", value=False,
+                                 help="Ask Mistral for images found in the pages and save them to the output folder")
+
+    # Phone photos are shrunk and recompressed before upload; OCR does not need their full resolution
+    preprocess_images = False
+    max_long_edge = image_preprocess.DEFAULT_MAX_LONG_EDGE
+    if source_type == "Local Upload" and file_type == "Image" and image_preprocess.is_available():
+        preprocess_images = st.checkbox("Shrink images before upload", value=True,
+                                        help="Auto-rotate, downscale, convert grayscale pages and recompress as JPEG")
+        if preprocess_images:
+            max_long_edge = st.number_input("Maximum image size (longer side, px)", min_value=500, max_value=10000,
+                                            value=image_preprocess.DEFAULT_MAX_LONG_EDGE, step=250)
+
     # 4. Process Button & OCR Handling
+    # The batch runs as a background job so widget interactions (which rerun
+    # this script) do not interrupt it; the panel below polls its progress
     if st.button("Process"):
-        if source_type == "URL" and not input_url.strip():
+        running_job = job_queue.status(st.session_state["ocr_job"]) if st.session_state.get("ocr_job") else None
+        if running_job and running_job["state"] not in FINISHED_STATES:
+            # The running batch still reads this session's uploads; starting another would delete them under it
+            st.warning("An OCR batch is still running. Cancel it or wait for it to finish before processing again.")
+        elif source_type == "URL" and not input_url.strip():
             st.error("Please enter at least one valid URL.")
         elif source_type == "Local Upload" and not uploaded_files:
             st.error("Please upload at least one file.")
         else:
-            client = Mistral(api_key=api_key)
+            client = mistralai.Mistral(api_key=api_key)
             st.session_state["ocr_result"] = []
             st.session_state["preview_src"] = []
-            st.session_state["image_bytes"] = []
+            st.session_state["page_image_dirs"] = []
+            artifact_store.release_session(session_id)
             
             sources = input_url.split("\n") if source_type == "URL" else uploaded_files
+            documents = []
+            previews = []
+            labels = []
+            content_hashes = []
+            mime_types = []
             
-            for idx, source in enumerate(sources):
-                if file_type == "PDF":
-                    if source_type == "URL":
+            for source in sources:
+                content_hash = None
+                mime_type = None
+                if source_type == "URL":
+                    if file_type == "PDF":
                         document = {"type": "document_url", "document_url": source.strip()}
-                        preview_src = source.strip()
                     else:
-                        file_bytes = source.read()
-                        encoded_pdf = base64.b64encode(file_bytes).decode("utf-8")
-                        document = {"type": "document_url", "document_url": f"data:application/pdf;base64,{encoded_pdf}"}
-                        preview_src = f"data:application/pdf;base64,{encoded_pdf}"
-                else:
-                    if source_type == "URL":
                         document = {"type": "image_url", "image_url": source.strip()}
-                        preview_src = source.strip()
-                    else:
-                        file_bytes = source.read()
-                        mime_type = source.type
-                        encoded_image = base64.b64encode(file_bytes).decode("utf-8")
-                        document = {"type": "image_url", "image_url": f"data:{mime_type};base64,{encoded_image}"}
-                        preview_src = f"data:{mime_type};base64,{encoded_image}"
-                        st.session_state["image_bytes"].append(file_bytes)
+                    preview_src = source.strip()
+                else:
+                    # Stream the upload into the artifact store and keep only its handle;
+                    # the document payload is built from the file on the worker thread
+                    mime_type = "application/pdf" if file_type == "PDF" else source.type
+                    preview_src = artifact_store.ingest(session_id, source, source.name)
+                    content_hash = os.path.splitext(preview_src)[0]
+                    document = None
+                
+                documents.append(document)
+                previews.append(preview_src)
+                labels.append(source.strip() if source_type == "URL" else source.name)
+                content_hashes.append(content_hash)
+                mime_types.append(mime_type)
+            
+            cache_options = ",".join(
+                (["images"] if extract_images else []) +
+                ([image_preprocess.preprocess_options(max_long_edge)] if preprocess_images else [])
+            )
+            cache_keys = [make_key(OCR_MODEL, content_hash=content_hashes[idx], url=labels[idx], options=cache_options) for idx in range(len(documents))]
+            image_dirs = [os.path.join(output_folder, "page_images", key[:16]) if extract_images else None for key in cache_keys]
+            if job_manifest:
+                job_manifest.start_batch([
+                    {"key": cache_keys[idx], "label": labels[idx], "preview": previews[idx], "image_dir": image_dirs[idx]}
+                    for idx in range(len(documents))
+                ], origin="app")
+            # Local uploads can fall back to tesseract, PDFs included
+            use_offline_ocr = source_type == "Local Upload" and offline_ocr.is_available("application/pdf" if file_type == "PDF" else "image/png")
+            
+            def ocr_batch(job):
+                # Documents a previous run already finished with Mistral are resumed
+                # from the job manifest, repeat documents are answered from the cache,
+                # and only the rest go to Mistral (fallback text is retried there)
+                results = [None] * len(documents)
+                if job_manifest:
+                    text_paths = job_manifest.completed_paths(cache_keys, "ocr", engines=("mistral",))
+                    for idx, key in enumerate(cache_keys):
+                        if text_paths[key]:
+                            results[idx] = read_text(text_paths[key])
+                if ocr_cache:
+                    for idx, key in enumerate(cache_keys):
+                        if results[idx] is None:
+                            results[idx] = ocr_cache.get(key)
+                pending = [idx for idx, result_text in enumerate(results) if result_text is None]
                 
-                with st.spinner(f"Processing {source if source_type == 'URL' else source.name}..."):
+                # Send remaining documents concurrently and collect results back in input order
+                completed = len(documents) - len(pending)
+                job.update(completed, len(documents), f"Processing {completed}/{len(documents)} documents ({completed} cached)...")
+                # Returns (text, whether the offline fallback produced it). The fallback
+                # runs here on the worker thread so failed documents are recovered in
+                # parallel, each PDF's pages spread over the offline OCR process pool.
+                def ocr_task(idx):
+                    document = documents[idx]
+                    file_id = None
                     try:
-                        ocr_response = client.ocr.process(model="mistral-ocr-latest", document=document, include_image_base64=True)
-                        time.sleep(1)  # wait 1 second between request to prevent rate limit exceeding
-                        
-                        pages = ocr_response.pages if hasattr(ocr_response, "pages") else (ocr_response if isinstance(ocr_response, list) else [])
-                        result_text = "\n\n".join(page.markdown for page in pages) or "No result found."
-                    except Exception as e:
-                        if pytesseract and file_type == "Image" and source_type == "Local Upload":
-                            st.warning("Mistral OCR failed. Using fallback OCR (pytesseract)...")
-                            try:
-                                image = Image.open(source)
-                                result_text = pytesseract.image_to_string(image)
-                            except Exception as fallback_err:
-                                result_text = f"Fallback OCR failed: {fallback_err}"
+                        if document is None:
+                            path, mime_type = artifact_store.path(previews[idx]), mime_types[idx]
+                            if preprocess_images:
+                                path, mime_type, _ = image_preprocess.preprocess_image(path, content_hashes[idx], mime_type, output_folder,
+                                                                                       max_long_edge=max_long_edge)
+                            document, file_id = prepare_local_document(client, path, labels[idx], mime_type)
+                        return run_ocr(client, document, limiter=limiter, image_folder=image_dirs[idx]), False
+                    except Exception:
+                        if not use_offline_ocr:
+                            raise
+                        job.note(f"Mistral OCR failed for {labels[idx]}. Using fallback OCR (pytesseract)...")
+                        return offline_ocr.ocr_file(artifact_store.path(previews[idx]), mime_types[idx]), True
+                    finally:
+                        delete_uploaded_file(client, file_id)
+                
+                if job_manifest:
+                    for idx in pending:
+                        job_manifest.start(cache_keys[idx], "ocr")
+                
+                for pending_idx, task_result, error in dispatch_ocr(pending, ocr_task, max_in_flight=max_in_flight):
+                    idx = pending[pending_idx]
+                    succeeded = error is None
+                    if error is None:
+                        result_text, used_fallback = task_result
+                        # Only Mistral results are cached under the Mistral model's key
+                        if ocr_cache and not used_fallback:
+                            ocr_cache.put(cache_keys[idx], result_text)
+                    elif use_offline_ocr:
+                        result_text = f"Fallback OCR failed: {error}"
+                    else:
+                        result_text = f"Error extracting result: {error}"
+                    
+                    # Record the finished document as soon as it is done
+                    if job_manifest:
+                        if succeeded:
+                            saved, text_path = save_file(result_text, f"{cache_keys[idx][:16]}.txt",
+                                                         os.path.join(output_folder, TEXT_DIRNAME), file_type="text")
+                            if saved:
+                                job_manifest.finish(cache_keys[idx], "ocr", text_path, "tesseract" if used_fallback else "mistral")
                         else:
-                            result_text = f"Error extracting result: {e}"
+                            job_manifest.fail(cache_keys[idx], "ocr", error)
                     
-                    st.session_state["ocr_result"].append(result_text)
-                    st.session_state["preview_src"].append(preview_src)
+                    results[idx] = result_text
+                    completed += 1
+                    job.update(completed, len(documents), f"Processed {labels[idx]} ({completed}/{len(documents)})")
+                
+                return {"results": results, "previews": previews, "image_dirs": image_dirs}
+            
+            st.session_state["ocr_job"] = job_queue.submit("ocr", ocr_batch, label=f"{len(documents)} documents")
 
-    # 5. Display Preview and OCR Results if available
-    if st.session_state["ocr_result"]:
-        for idx, result in enumerate(st.session_state["ocr_result"]):
-            st.markdown("---")
-            st.subheader(f"Result {idx+1}")
+    # Progress of the running OCR job; only this panel reruns while polling
+    @st.fragment(run_every=1.0)
+    def ocr_job_panel():
+        job_id = st.session_state.get("ocr_job")
+        status = job_queue.status(job_id) if job_id else None
+        if status is None:
+            st.session_state.pop("ocr_job", None)
+            return
+        for message in status["messages"]:
+            st.warning(message)
+        if status["state"] == "done":
+            job_result = job_queue.result(job_id)
+            st.session_state["ocr_result"] = job_result["results"]
+            st.session_state["preview_src"] = job_result["previews"]
+            st.session_state["page_image_dirs"] = job_result["image_dirs"]
+            del st.session_state["ocr_job"]
+            st.rerun()
+        elif status["state"] in ("failed", "cancelled"):
+            st.error(f"OCR job {status['state']}: {status['error'] or 'stopped before it finished'}")
+            del st.session_state["ocr_job"]
+        else:
+            fraction = status["done"] / status["total"] if status["total"] else 0.0
+            st.progress(fraction, text=status["message"] or "Waiting for a free worker...")
+            if st.button("Cancel", key="cancel_ocr_job"):
+                job_queue.cancel(job_id)
+    
+    if st.session_state.get("ocr_job"):
+        ocr_job_panel()
+
+    # A new session (tab closed, browser restarted) can pick up the last batch
+    # processed into this output folder
+    if not st.session_state["ocr_result"] and job_manifest and not st.session_state.get("ocr_job"):
+        last_batch = job_manifest.last_batch("app")
+        if last_batch:
+            batch_documents = last_batch[1]
+            completed = job_manifest.completed_paths([document["key"] for document in batch_documents], "ocr")
+            text_paths = [completed[document["key"]] for document in batch_documents]
+            finished = sum(1 for text_path in text_paths if text_path)
+            if finished and st.button(f"Restore last batch ({finished} of {len(batch_documents)} documents finished)"):
+                st.session_state["ocr_result"] = [
+                    read_text(text_path) if text_path else f"Not processed yet: {document['label']}. Process it again to resume."
+                    for document, text_path in zip(batch_documents, text_paths)
+                ]
+                st.session_state["preview_src"] = [document["preview"] for document in batch_documents]
+                st.session_state["page_image_dirs"] = [document.get("image_dir") for document in batch_documents]
+
+    # One result's preview, editor and actions. As a fragment, interacting with
+    # one result reruns only that result instead of every result on the page.
+    @st.fragment
+    def result_panel(idx):
+        result = st.session_state["ocr_result"][idx]
+        st.markdown("---")
+        st.subheader(f"Result {idx+1}")
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            # Local uploads are artifact handles, URLs are previewed directly
+            preview_src = st.session_state["preview_src"][idx]
+            preview_path = artifact_store.path(preview_src) if source_type == "Local Upload" else None
+            # A stored upload keeps its extension, which outlives the file type radio
+            is_pdf = preview_src.lower().endswith(".pdf") if preview_path else file_type == "PDF"
+            st.subheader(f"Input {'PDF' if is_pdf else 'Image'}")
+            if source_type == "Local Upload" and preview_path is None:
+                st.info("Preview is no longer available. Process the file again to restore it.")
+            elif is_pdf and preview_path and thumbnails.is_available():
+                # Uploaded PDFs are shown as low-resolution page thumbnails,
+                # a few pages at a time, instead of sending the whole file
+                try:
+                    page_total = get_pdf_page_count(preview_src)
+                except Exception as e:
+                    page_total = 0
+                    st.warning(f"Could not read this file as a PDF for a preview: {e}")
+                if page_total:
+                    view_count = max(1, math.ceil(page_total / thumbnails.PAGES_PER_VIEW))
+                    view = st.number_input(f"Pages (view 1-{view_count})", min_value=1, max_value=view_count, value=1,
+                                           key=f"preview_view_{idx}") if view_count > 1 else 1
+                    first_page = (view - 1) * thumbnails.PAGES_PER_VIEW
+                    page_indices = list(range(first_page, min(first_page + thumbnails.PAGES_PER_VIEW, page_total)))
+                    try:
+                        thumbnail_paths = thumbnails.get_thumbnails(preview_path, os.path.splitext(preview_src)[0], output_folder, page_indices)
+                        thumb_cols = st.columns(2)
+                        for position, (page_index, thumbnail_path) in enumerate(zip(page_indices, thumbnail_paths)):
+                            thumb_cols[position % 2].image(thumbnail_path, caption=f"Page {page_index + 1} of {page_total}")
+                    except Exception as e:
+                        st.warning(f"Could not render page previews: {e}")
+            elif is_pdf:
+                pdf_src = get_pdf_data_uri(preview_src) if preview_path else preview_src
+                pdf_embed_html = f'<iframe src="{pdf_src}" width="100%" height="400" frameborder="0"></iframe>'
+                st.markdown(pdf_embed_html, unsafe_allow_html=True)
+            else:
+                st.image(preview_path or preview_src)
             
-            col1, col2 = st.columns(2)
+            # Page images saved to disk during extraction
+            page_image_dirs = st.session_state["page_image_dirs"]
+            image_dir = page_image_dirs[idx] if idx < len(page_image_dirs) else None
+            if image_dir and os.path.isdir(image_dir):
+                image_files = sorted(os.listdir(image_dir))
+                if image_files:
+                    with st.expander(f"Extracted page images ({len(image_files)})"):
+                        for image_file in image_files:
+                            st.image(os.path.join(image_dir, image_file), caption=image_file)
+        
+        with col2:
+            st.subheader("OCR Results")
             
-            with col1:
-                file_type_label = "PDF" if file_type == "PDF" else "Image"
-                st.subheader(f"Input {file_type_label}")
-                if file_type == "PDF":
-                    pdf_embed_html = f'<iframe src="{st.session_state["preview_src"][idx]}" width="100%" height="400" frameborder="0"></iframe>'
-                    st.markdown(pdf_embed_html, unsafe_allow_html=True)
-                else:
-                    if source_type == "Local Upload" and idx < len(st.session_state["image_bytes"]):
-                        st.image(st.session_state["image_bytes"][idx])
-                    else:
-                        st.image(st.session_state["preview_src"][idx])
+            # Show results in a text area that can be edited
+            edited_text = st.text_area(
+                "Extracted text (you can edit this)",
+                value=result,
+                height=300,
+                key=f"result_text_{idx}"
+            )
             
-            with col2:
-                st.subheader("OCR Results")
-                
-                # Show results in a text area that can be edited
-                edited_text = st.text_area(
-                    "Extracted text (you can edit this)",
-                    value=result,
-                    height=300,
-                    key=f"result_text_{idx}"
-                )
-                
-                # LangChain-based Summarization
-                if st.button(f"Summarize Text", key=f"summarize_{idx}"):
-                    if not openai_api_key:
-                        st.error("Please enter your OpenAI API Key.")
-                    else:
-                        try:
-                            llm = ChatOpenAI(openai_api_key=openai_api_key, model="gpt-3.5-turbo", temperature=0)
-                            prompt = PromptTemplate(
-                                template="Summarize the following content:\n\n{text}", 
-                                input_variables=["text"]
-                            )
-                            chain = LLMChain(llm=llm, prompt=prompt)
-                            summary = chain.run({"text": edited_text})
-                            st.success("📌 Summary:")
+            # LangChain-based Summarization
+            if st.button(f"Summarize Text", key=f"summarize_{idx}"):
+                if not openai_api_key:
+                    st.error("Please enter your OpenAI API Key.")
+                else:
+                    try:
+                        # Long texts are summarized chunk by chunk and then combined
+                        summary_args = dict(
+                            cache=summary_cache,
+                            cache_namespace=f"{LLM_MODEL}|{LLM_TEMPERATURE}",
+                            model=LLM_MODEL
+                        )
+                        map_chain = get_chain(openai_api_key, SUMMARY_TEMPLATE)
+                        reduce_chain = get_chain(openai_api_key, COMBINE_TEMPLATE)
+                        st.success("📌 Summary:")
+                        if stream_responses:
+                            write_timed_stream("summary", summarize_stream(edited_text, map_chain, reduce_chain, stream_chain, **summary_args))
+                        else:
+                            started_at = time.perf_counter()
+                            summary = summarize(edited_text, map_chain, reduce_chain, **summary_args)
+                            record_llm_timing("summary", None, time.perf_counter() - started_at)
                             st.markdown(summary)
-                        except Exception as ex:
-                            st.error(f"Failed to summarize: {ex}")
-                            
-                # LangChain-based Question Answering
-                st.markdown("### Ask a Question based on the above text")
-                question = st.text_input(f"Enter your question for Result {idx+1}:", key=f"qna_input_{idx}")
-                
-                if st.button(f"Get Answer", key=f"qna_btn_{idx}"):
-                    if not openai_api_key:
-                        st.error("Please enter your OpenAI API Key.")
-                    elif not question:
-                        st.warning("Please enter a question.")
-                    else:
-                        try:
-                            llm = ChatOpenAI(openai_api_key=openai_api_key, model="gpt-3.5-turbo", temperature=0)
-                            prompt = PromptTemplate(
-                                template="Given the following context:\n\n{text}\n\nAnswer this question:\n\n{question}",
-                                input_variables=["text", "question"]
-                            )
-                            chain = LLMChain(llm=llm, prompt=prompt)
-                            answer = chain.run({"text": edited_text, "question": question})
-                            st.success("🧠 Answer:")
+                    except Exception as ex:
+                        st.error(f"Failed to summarize: {ex}")
+                        
+            # LangChain-based Question Answering
+            st.markdown("### Ask a Question based on the above text")
+            question = st.text_input(f"Enter your question for Result {idx+1}:", key=f"qna_input_{idx}")
+            
+            if st.button(f"Get Answer", key=f"qna_btn_{idx}"):
+                if not openai_api_key:
+                    st.error("Please enter your OpenAI API Key.")
+                elif not question:
+                    st.warning("Please enter a question.")
+                else:
+                    try:
+                        # Repeated or near-identical questions on the same text are answered from the cache
+                        embedder = get_embedder(openai_api_key, embedding_backend)
+                        qa_doc_key = f"{LLM_MODEL}|{embedder.name}|{document_hash(edited_text)}"
+                        answer, question_vector = qa_cache.lookup(qa_doc_key, question, embedder if match_similar_questions else None)
+                        st.success("🧠 Answer:")
+                        if answer is None:
+                            # Only the chunks most relevant to the question go into the prompt
+                            context = retrieve_context(edited_text, question, embedder, output_folder, question_vector=question_vector)
+                            chain = get_chain(openai_api_key, QA_TEMPLATE)
+                            qa_inputs = {"text": context, "question": question}
+                            if stream_responses:
+                                answer = write_timed_stream("answer", stream_chain(chain, qa_inputs))
+                            else:
+                                started_at = time.perf_counter()
+                                answer = chain.run(qa_inputs)
+                                record_llm_timing("answer", None, time.perf_counter() - started_at)
+                                st.markdown(answer)
+                            qa_cache.put(qa_doc_key, question, answer, question_vector)
+                        else:
+                            st.caption("Answered from cache")
                             st.markdown(answer)
-                        except Exception as e:
-                            st.error(f"Q&A failed: {e}")
-                
-                # Update the session state with any edits
-                st.session_state["ocr_result"][idx] = edited_text
-                
-                # Horizontal layout for buttons
-                btn_col1, btn_col2, btn_col3, btn_col4 = st.columns(4)
-                
-                with btn_col1:
-                    # JSON download
+                    except Exception as e:
+                        st.error(f"Q&A failed: {e}")
+            
+            # Update the session state with any edits
+            st.session_state["ocr_result"][idx] = edited_text
+            
+            # Horizontal layout for buttons
+            btn_col1, btn_col2, btn_col3, btn_col4 = st.columns(4)
+            
+            # Download payloads are only built when the button is clicked
+            with btn_col1:
+                # JSON download
+                st.download_button("Download JSON", data=partial(json_payload, edited_text), file_name=f"Output_{idx+1}.json",
+                                   mime="application/json", key=f"download_json_{idx}", on_click="ignore")
+            
+            with btn_col2:
+                # Text download
+                st.download_button("Download Text", data=partial(text_payload, edited_text), file_name=f"Output_{idx+1}.txt",
+                                   mime="text/plain", key=f"download_text_{idx}", on_click="ignore")
+            
+            with btn_col3:
+                # Save JSON to folder
+                if st.button(f"Save JSON to Folder", key=f"save_json_{idx}"):
                     json_data = json.dumps({"ocr_result": edited_text}, ensure_ascii=False, indent=2)
-                    json_b64 = base64.b64encode(json_data.encode()).decode()
-                    st.markdown(
-                        f'<a href="data:application/json;base64,{json_b64}" download="Output_{idx+1}.json">Download JSON</a>',
-                        unsafe_allow_html=True
-                    )
-                
-                with btn_col2:
-                    # Text download
-                    text_b64 = base64.b64encode(edited_text.encode()).decode()
-                    st.markdown(
-                        f'<a href="data:text/plain;base64,{text_b64}" download="Output_{idx+1}.txt">Download Text</a>',
-                        unsafe_allow_html=True
+                    success, result_path = save_file(
+                        json_data, 
+                        f"Output_{idx+1}.json", 
+                        output_folder,
+                        file_type="text"
                     )
-                
-                with btn_col3:
-                    # Save JSON to folder
-                    if st.button(f"Save JSON to Folder", key=f"save_json_{idx}"):
-                        json_data = json.dumps({"ocr_result": edited_text}, ensure_ascii=False, indent=2)
-                        success, result_path = save_file(
-                            json_data, 
-                            f"Output_{idx+1}.json", 
-                            output_folder,
-                            file_type="text"
-                        )
-                        if success:
-                            st.success(f"JSON saved to: {result_path}")
-                            # Verify if file exists
-                            if os.path.exists(result_path):
-                                st.success(f"✓ Verified: File exists at {result_path}")
-                            else:
-                                st.error(f"✗ File not found at {result_path}")
+                    if success:
+                        st.success(f"JSON saved to: {result_path}")
+                        # Verify if file exists
+                        if os.path.exists(result_path):
+                            st.success(f"✓ Verified: File exists at {result_path}")
                         else:
-                            st.error(f"Failed to save JSON: {result_path}")
-                
-                with btn_col4:
-                    # Save Text to folder
-                    if st.button(f"Save Text to Folder", key=f"save_text_{idx}"):
-                        success, result_path = save_file(
-                            edited_text, 
-                            f"Output_{idx+1}.txt", 
-                            output_folder,
-                            file_type="text"
-                        )
-                        if success:
-                            st.success(f"Text saved to: {result_path}")
-                            # Verify if file exists
-                            if os.path.exists(result_path):
-                                st.success(f"✓ Verified: File exists at {result_path}")
-                            else:
-                                st.error(f"✗ File not found at {result_path}")
+                            st.error(f"✗ File not found at {result_path}")
+                    else:
+                        st.error(f"Failed to save JSON: {result_path}")
+            
+            with btn_col4:
+                # Save Text to folder
+                if st.button(f"Save Text to Folder", key=f"save_text_{idx}"):
+                    success, result_path = save_file(
+                        edited_text, 
+                        f"Output_{idx+1}.txt", 
+                        output_folder,
+                        file_type="text"
+                    )
+                    if success:
+                        st.success(f"Text saved to: {result_path}")
+                        # Verify if file exists
+                        if os.path.exists(result_path):
+                            st.success(f"✓ Verified: File exists at {result_path}")
                         else:
-                            st.error(f"Failed to save text: {result_path}")
-                
-                # Button to convert this specific result to audio
-                if st.button(f"Convert to Audio", key=f"convert_btn_{idx}"):
-                    # Store this specific text in session state for the audio tab
-                    st.session_state["current_text_for_audio"] = edited_text
-                    # Switch to the audio tab
-                    st.info("Text ready for conversion. Please go to the 'Text to Audio Conversion' tab.")
+                            st.error(f"✗ File not found at {result_path}")
+                    else:
+                        st.error(f"Failed to save text: {result_path}")
+            
+            # Button to convert this specific result to audio
+            if st.button(f"Convert to Audio", key=f"convert_btn_{idx}"):
+                # Store this specific text in session state for the audio tab
+                st.session_state["current_text_for_audio"] = edited_text
+                # Rerun the whole page once so the audio tab picks the text up
+                st.session_state["convert_notice"] = idx
+                st.rerun()
+            if st.session_state.get("convert_notice") == idx:
+                del st.session_state["convert_notice"]
+                st.info("Text ready for conversion. Please go to the 'Text to Audio Conversion' tab.")
+
+    # 5. Display Preview and OCR Results if available
+    for idx in range(len(st.session_state["ocr_result"])):
+        result_panel(idx)
 
 # Text to Audio Tab
 with tab2:
@@ -386,6 +777,23 @@ with tab2:
             ["alloy", "echo", "fable", "onyx", "nova", "shimmer"]
         )
     
+    # Long texts are synthesized in parallel chunks
+    tts_workers = st.slider("Max concurrent TTS requests", min_value=1, max_value=8, value=DEFAULT_TTS_WORKERS,
+                            help="Long texts are split into chunks that are converted in parallel")
+    
+    # Streaming plays the first part while the rest is still being generated
+    stream_audio = st.checkbox("Stream audio (start playback before the whole file is ready)", value=True)
+    
+    # Previously synthesized texts and paragraphs are reused from disk
+    use_tts_cache = st.checkbox("Reuse cached audio", value=True,
+                                help="Unchanged texts and paragraphs are not sent to OpenAI again")
+    tts_cache = None
+    if use_tts_cache:
+        try:
+            tts_cache = get_tts_cache(audio_output_folder)
+        except Exception as e:
+            st.warning(f"Audio cache unavailable: {e}")
+    
     text_for_audio = ""
     
     if text_source == "OCR results":
@@ -439,53 +847,88 @@ with tab2:
             )
     
     # Function to convert text to audio
-    def convert_text_to_speech(text, api_key, voice="alloy"):
+    # When on_chunk is given the audio is streamed: on_chunk(index, count, mp3_bytes)
+    # is called as soon as each chunk can be played. It runs on a background
+    # worker, so warnings go to notify instead of the page.
+    def convert_text_to_speech(text, api_key, voice="alloy", max_workers=DEFAULT_TTS_WORKERS, on_chunk=None, cache=None,
+                               http=None, notify=None, on_progress=None):
+        temp_file_path = None
         try:
-            # Prepare the API request
-            headers = {
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json"
-            }
-            
-            # OpenAI's TTS endpoint
-            url = "https://api.openai.com/v1/audio/speech"
-            
-            data = {
-                "model": "tts-1",
-                "input": text,
-                "voice": voice
-            }
-            
-            # Send the request to the TTS API
-            response = requests.post(url, headers=headers, json=data)
-            
-            # Check if the request was successful
-            if response.status_code == 200:
+            if on_chunk is None:
+                # Long texts are split into chunks that are synthesized concurrently
+                # and joined into a single MP3
+                audio_content = synthesize(text, api_key, voice=voice, max_workers=max_workers, http=http, cache=cache,
+                                           on_progress=on_progress)
+                
                 # Save the audio to a temporary file
                 with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as temp_file:
-                    temp_file.write(response.content)
+                    temp_file.write(audio_content)
                     temp_file_path = temp_file.name
-                
-                return True, temp_file_path, response.content
             else:
-                # Fallback to gTTS if available
-                if gTTS:
-                    try:
-                        st.warning("OpenAI TTS failed. Using fallback gTTS...")
-                        gtts_obj = gTTS(text=text, lang='en')
-                        temp_file_path = os.path.join(tempfile.gettempdir(), "output_fallback.mp3")
-                        gtts_obj.save(temp_file_path)
-                        with open(temp_file_path, "rb") as f:
-                            audio_content = f.read()
-                            return True, temp_file_path, audio_content
-                    except Exception as fallback_err:
-                        return False, f"gTTS fallback failed: {fallback_err}", None
-                else:
-                    return False, f"OpenAI TTS failed: {response.status_code} - {response.text}", None
+                # Write to the output file progressively while handing chunks over for playback
+                with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as temp_file:
+                    temp_file_path = temp_file.name
+                for chunk_idx, chunk_count, segment in synthesize_stream(text, api_key, temp_file_path, voice=voice, max_workers=max_workers, http=http, cache=cache):
+                    on_chunk(chunk_idx, chunk_count, segment)
+                with open(temp_file_path, "rb") as f:
+                    audio_content = f.read()
+            
+            return True, temp_file_path, audio_content
+        
+        except TTSError as tts_err:
+            # Fallback to gTTS if available
+            if gtts:
+                try:
+                    if notify:
+                        notify("OpenAI TTS failed. Using fallback gTTS...")
+                    # Each job gets its own file since several can run at once
+                    with tempfile.NamedTemporaryFile(delete=False, suffix='_fallback.mp3') as temp_file:
+                        temp_file_path = temp_file.name
+                    audio_content = gtts_to_file(text, temp_file_path)
+                    return True, temp_file_path, audio_content
+                except Exception as fallback_err:
+                    return False, f"gTTS fallback failed: {fallback_err}", None
+            else:
+                return False, str(tts_err), None
+        
+        except JobCancelled:
+            # Not an error: let the job queue mark the job cancelled
+            if temp_file_path and os.path.exists(temp_file_path):
+                os.remove(temp_file_path)
+            raise
         
         except Exception as e:
             return False, f"Error: {str(e)}", None
     
+    # Background audio job; streamed parts are written to their own files and
+    # published by path as they are ready
+    def audio_job(job, text, api_key, voice, max_workers, stream, cache, http):
+        def publish_chunk(chunk_idx, chunk_count, segment):
+            with tempfile.NamedTemporaryFile(delete=False, suffix=f"_part{chunk_idx+1}.mp3") as part_file:
+                part_file.write(segment)
+            job.add_partial(part_file.name)
+            job.update(chunk_idx + 1, chunk_count, f"Part {chunk_idx+1} of {chunk_count} ready")
+        
+        # Progress checkpoint between chunks; raises JobCancelled once Cancel was clicked
+        def report_progress(done, total):
+            job.update(done, total, f"Converted {done} of {total} parts")
+        
+        job.update(0, 1, "Converting text to audio...")
+        success, audio_path, audio_content = convert_text_to_speech(
+            text, api_key, voice=voice, max_workers=max_workers,
+            on_chunk=publish_chunk if stream else None, cache=cache, http=http, notify=job.note,
+            on_progress=report_progress
+        )
+        if not success:
+            raise RuntimeError(audio_path)
+        return {"path": audio_path}
+    
+    # Delete the part files of a streamed job
+    def remove_audio_parts(part_paths):
+        for part_path in part_paths:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+    
     # Initialize audio results in session state
     if "audio_results" not in st.session_state:
         st.session_state["audio_results"] = []
@@ -497,69 +940,139 @@ with tab2:
         elif not text_for_audio:
             st.error("Please provide text to convert to audio.")
         else:
-            with st.spinner("Converting text to audio..."):
-                success, audio_path, audio_content = convert_text_to_speech(
-                    text_for_audio, 
-                    openai_api_key,
-                    voice=voice_option
+            job_id = job_queue.submit(
+                "tts", audio_job, text_for_audio, openai_api_key, voice_option, tts_workers, stream_audio,
+                tts_cache, get_http_session(tts_workers), label=voice_option
+            )
+            # A new job replaces the players of the previous one
+            if "audio_parts" in st.session_state:
+                remove_audio_parts(st.session_state.pop("audio_parts")["paths"])
+            st.session_state["audio_job"] = {
+                "id": job_id,
+                "text": text_for_audio,
+                "voice": voice_option,
+                "key": make_audio_key(text_for_audio, voice_option, TTS_MODEL)
+            }
+    
+    # Progress of the running audio job; only this panel reruns while polling.
+    # Streamed parts are played as soon as they arrive, the first one
+    # automatically. When the job is done the part files are handed to the
+    # page, which keeps their players until the user closes them.
+    @st.fragment(run_every=1.0)
+    def audio_job_panel():
+        audio_job_info = st.session_state.get("audio_job")
+        status = job_queue.status(audio_job_info["id"]) if audio_job_info else None
+        if status is None:
+            st.session_state.pop("audio_job", None)
+            return
+        for message in status["messages"]:
+            st.warning(message)
+        if status["state"] == "done":
+            job_result = job_queue.result(audio_job_info["id"])
+            # Store in session state, once per text and voice
+            if any(entry.get("key") == audio_job_info["key"] for entry in st.session_state["audio_results"]):
+                st.session_state["audio_notice"] = ("info", "This text was already converted with the same voice. See the list below.")
+            else:
+                text = audio_job_info["text"]
+                st.session_state["audio_results"].append({
+                    "text": text[:100] + "..." if len(text) > 100 else text,
+                    "path": job_result["path"],
+                    "voice": audio_job_info["voice"],
+                    "key": audio_job_info["key"]
+                })
+                st.session_state["audio_notice"] = ("success", "Audio generated successfully!")
+            if status["partial"]:
+                st.session_state["audio_parts"] = {
+                    "paths": status["partial"],
+                    "first_audio_seconds": status["first_partial_at"] - status["started_at"]
+                }
+            del st.session_state["audio_job"]
+            # Rerun the whole page so the audio list and notice pick up the result
+            st.rerun()
+        elif status["state"] == "cancelled":
+            st.info("Audio generation cancelled.")
+            remove_audio_parts(status["partial"])
+            del st.session_state["audio_job"]
+        elif status["state"] == "failed":
+            st.error(f"Error generating audio: {status['error']}")
+            remove_audio_parts(status["partial"])
+            del st.session_state["audio_job"]
+        else:
+            st.caption(status["message"] or "Waiting for a free worker...")
+            if status["first_partial_at"]:
+                st.caption(f"First audio ready after {status['first_partial_at'] - status['started_at']:.1f}s")
+            for part_idx, part_path in enumerate(status["partial"]):
+                st.audio(part_path, format="audio/mp3", autoplay=(part_idx == 0))
+            if st.button("Cancel", key="cancel_audio_job"):
+                job_queue.cancel(audio_job_info["id"])
+    
+    if st.session_state.get("audio_job"):
+        audio_job_panel()
+    
+    # Parts of a finished streamed job, read from disk, until the user closes them
+    audio_parts = st.session_state.get("audio_parts")
+    if audio_parts:
+        st.caption("All parts ready. The full file is also saved to the audio list below.")
+        st.caption(f"First audio ready after {audio_parts['first_audio_seconds']:.1f}s")
+        for part_path in audio_parts["paths"]:
+            if os.path.exists(part_path):
+                st.audio(part_path, format="audio/mp3")
+        if st.button("Close player", key="close_audio_player"):
+            remove_audio_parts(audio_parts["paths"])
+            del st.session_state["audio_parts"]
+            st.rerun()
+    if "audio_notice" in st.session_state:
+        notice_kind, notice = st.session_state.pop("audio_notice")
+        (st.info if notice_kind == "info" else st.success)(notice)
+    
+    # One generated audio entry; its buttons rerun only this entry
+    @st.fragment
+    def audio_entry_panel(idx):
+        audio_data = st.session_state["audio_results"][idx]
+        # Show text snippet
+        st.markdown(f"**Text:** {audio_data['text']}")
+        
+        # Audio player
+        st.audio(audio_data["path"])
+        
+        # Two columns for download options
+        dl_col1, dl_col2 = st.columns(2)
+        
+        with dl_col1:
+            # Download for audio, read from the file on disk when clicked
+            st.download_button("Download Audio File", data=partial(read_file_bytes, audio_data["path"]), file_name=f"Audio_{idx+1}.mp3",
+                               mime="audio/mpeg", key=f"download_audio_{idx}", on_click="ignore")
+        
+        with dl_col2:
+            # Save audio to folder
+            if st.button(f"Save Audio to Folder", key=f"save_audio_{idx}"):
+                # Generate a filename based on text content
+                text_preview = audio_data["text"][:20].replace(" ", "_")
+                filename = f"Audio_{idx+1}_{text_preview}.mp3"
+                
+                success, result_path = save_file(
+                    read_file_bytes(audio_data["path"]),
+                    filename,
+                    audio_output_folder
                 )
                 
                 if success:
-                    # Store in session state
-                    st.session_state["audio_results"].append({
-                        "text": text_for_audio[:100] + "..." if len(text_for_audio) > 100 else text_for_audio,
-                        "path": audio_path,
-                        "content": audio_content,
-                        "voice": voice_option
-                    })
-                    
-                    st.success("Audio generated successfully!")
+                    st.success(f"Audio saved to: {result_path}")
+                    # Verify if file exists
+                    if os.path.exists(result_path):
+                        st.success(f"✓ Verified: File exists at {result_path}")
+                    else:
+                        st.error(f"✗ File not found at {result_path}")
                 else:
-                    st.error(f"Error generating audio: {audio_path}")
-    
+                    st.error(f"Failed to save audio: {result_path}")
+
     # Display audio results
     if st.session_state["audio_results"]:
         st.subheader("Generated Audio Files")
         
         for idx, audio_data in enumerate(st.session_state["audio_results"]):
             with st.expander(f"Audio {idx+1} - {audio_data['voice']}", expanded=(idx == len(st.session_state["audio_results"])-1)):
-                # Show text snippet
-                st.markdown(f"**Text:** {audio_data['text']}")
-                
-                # Audio player
-                st.audio(audio_data["path"])
-                
-                # Two columns for download options
-                dl_col1, dl_col2 = st.columns(2)
-                
-                with dl_col1:
-                    # Download link for audio
-                    audio_b64 = base64.b64encode(audio_data["content"]).decode()
-                    audio_href = f'<a href="data:audio/mp3;base64,{audio_b64}" download="Audio_{idx+1}.mp3">Download Audio File</a>'
-                    st.markdown(audio_href, unsafe_allow_html=True)
-                
-                with dl_col2:
-                    # Save audio to folder
-                    if st.button(f"Save Audio to Folder", key=f"save_audio_{idx}"):
-                        # Generate a filename based on text content
-                        text_preview = audio_data["text"][:20].replace(" ", "_")
-                        filename = f"Audio_{idx+1}_{text_preview}.mp3"
-                        
-                        success, result_path = save_file(
-                            audio_data["content"],
-                            filename,
-                            audio_output_folder
-                        )
-                        
-                        if success:
-                            st.success(f"Audio saved to: {result_path}")
-                            # Verify if file exists
-                            if os.path.exists(result_path):
-                                st.success(f"✓ Verified: File exists at {result_path}")
-                            else:
-                                st.error(f"✗ File not found at {result_path}")
-                        else:
-                            st.error(f"Failed to save audio: {result_path}")
+                audio_entry_panel(idx)
 
 st.markdown("---")
 st.markdown("""
@@ -0,0 +1,179 @@
+import argparse
+import difflib
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from ocr_audio import image_preprocess, offline_ocr  # noqa: E402
+from ocr_audio.pipeline import MIME_TYPES, file_sha256  # noqa: E402
+
+IMAGE_EXTENSIONS = tuple(ext for ext, mime_type in MIME_TYPES.items() if mime_type.startswith("image/"))
+
+
+# Fixture images, each optionally paired with a <name>.txt of its expected text
+def load_fixtures(fixture_dir):
+    fixtures = []
+    for name in sorted(os.listdir(fixture_dir)):
+        stem, ext = os.path.splitext(name)
+        if ext.lower() not in IMAGE_EXTENSIONS:
+            continue
+        truth_path = os.path.join(fixture_dir, stem + ".txt")
+        truth = None
+        if os.path.exists(truth_path):
+            with open(truth_path, encoding="utf-8") as f:
+                truth = f.read()
+        fixtures.append((os.path.join(fixture_dir, name), MIME_TYPES[ext.lower()], truth))
+    return fixtures
+
+
+# Character-level similarity of two texts, ignoring whitespace layout
+def similarity(text, reference):
+    return difflib.SequenceMatcher(None, " ".join(text.split()), " ".join(reference.split()), autojunk=False).ratio()
+
+
+# Function returning the OCR text of a local image for the chosen engine
+def build_engine(engine, api_key):
+    if engine == "mistral":
+        from mistralai import Mistral
+        from ocr_audio.ocr_engine import run_ocr
+        from ocr_audio.uploads import delete_uploaded_file, prepare_local_document
+        client = Mistral(api_key=api_key)
+
+        def mistral_ocr(path, mime_type):
+            document, file_id = prepare_local_document(client, path, os.path.basename(path), mime_type)
+            try:
+                return run_ocr(client, document)
+            finally:
+                delete_uploaded_file(client, file_id)
+        return mistral_ocr
+    if engine == "tesseract":
+        return offline_ocr.ocr_file
+    return None
+
+
+def timed_ocr(ocr, path, mime_type):
+    started_at = time.perf_counter()
+    text = ocr(path, mime_type)
+    return text, time.perf_counter() - started_at
+
+
+# Preprocess and (optionally) OCR one fixture both ways
+def measure_fixture(path, mime_type, truth, ocr, folder_path, max_long_edge, max_dpi):
+    started_at = time.perf_counter()
+    processed_path, processed_mime, stats = image_preprocess.preprocess_image(
+        path, file_sha256(path), mime_type, folder_path, max_long_edge=max_long_edge, max_dpi=max_dpi
+    )
+    row = {
+        "fixture": os.path.basename(path),
+        "original_bytes": stats["original_bytes"],
+        "processed_bytes": stats["processed_bytes"],
+        "preprocess_seconds": round(time.perf_counter() - started_at, 4),
+        "kept_original": processed_path == path,
+    }
+    if ocr is None:
+        return row
+
+    original_text, row["original_ocr_seconds"] = timed_ocr(ocr, path, mime_type)
+    processed_text, row["processed_ocr_seconds"] = timed_ocr(ocr, processed_path, processed_mime)
+    if truth is not None:
+        row["original_accuracy"] = round(similarity(original_text, truth), 4)
+        row["processed_accuracy"] = round(similarity(processed_text, truth), 4)
+    else:
+        # Without a ground truth file, score how closely the processed text matches the original's
+        row["agreement"] = round(similarity(processed_text, original_text), 4)
+    return row
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compare upload size, OCR latency and OCR accuracy of original and preprocessed images."
+    )
+    parser.add_argument("fixtures", help="Folder of .jpg/.png images, each optionally with a <name>.txt of its expected text")
+    parser.add_argument("--engine", choices=["auto", "mistral", "tesseract", "none"], default="auto",
+                        help="OCR engine to time; auto uses Mistral when MISTRAL_API_KEY is set, else tesseract if installed")
+    parser.add_argument("--max-long-edge", type=int, default=image_preprocess.DEFAULT_MAX_LONG_EDGE)
+    parser.add_argument("--max-dpi", type=int, default=image_preprocess.DEFAULT_MAX_DPI)
+    parser.add_argument("--history", help="Append the summary as one JSON line to this file")
+    args = parser.parse_args(argv)
+
+    if not image_preprocess.is_available():
+        print("error: Pillow is not installed", file=sys.stderr)
+        return 2
+    fixtures = load_fixtures(args.fixtures)
+    if not fixtures:
+        print(f"error: no images found in {args.fixtures}", file=sys.stderr)
+        return 2
+
+    api_key = os.environ.get("MISTRAL_API_KEY")
+    engine = args.engine
+    if engine == "auto":
+        engine = "mistral" if api_key else ("tesseract" if offline_ocr.is_available("image/png") else "none")
+    if engine == "mistral" and not api_key:
+        print("error: the mistral engine needs MISTRAL_API_KEY", file=sys.stderr)
+        return 2
+    ocr = build_engine(engine, api_key)
+
+    rows = []
+    # Preprocessed copies go to a scratch output folder so the real cache is untouched
+    with tempfile.TemporaryDirectory() as folder_path:
+        for path, mime_type, truth in fixtures:
+            row = measure_fixture(path, mime_type, truth, ocr, folder_path, args.max_long_edge, args.max_dpi)
+            rows.append(row)
+            line = f"{row['fixture']:<32} {row['original_bytes'] / 1024:>9.1f}KB -> {row['processed_bytes'] / 1024:>8.1f}KB"
+            if "processed_ocr_seconds" in row:
+                line += f"  ocr {row['original_ocr_seconds']:.2f}s -> {row['processed_ocr_seconds']:.2f}s"
+                if "agreement" in row:
+                    line += f"  agreement {row['agreement']:.3f}"
+                else:
+                    line += f"  accuracy {row['original_accuracy']:.3f} -> {row['processed_accuracy']:.3f}"
+            print(line)
+
+    original_bytes = sum(row["original_bytes"] for row in rows)
+    processed_bytes = sum(row["processed_bytes"] for row in rows)
+    result = {
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "engine": engine,
+        "max_long_edge": args.max_long_edge,
+        "max_dpi": args.max_dpi,
+        "fixtures": len(rows),
+        "original_bytes": original_bytes,
+        "processed_bytes": processed_bytes,
+        "byte_reduction": round(1 - processed_bytes / original_bytes, 4) if original_bytes else 0.0,
+        "preprocess_median_seconds": round(statistics.median(row["preprocess_seconds"] for row in rows), 4),
+    }
+    if ocr is not None:
+        result["original_ocr_median_seconds"] = round(statistics.median(row["original_ocr_seconds"] for row in rows), 4)
+        result["processed_ocr_median_seconds"] = round(statistics.median(row["processed_ocr_seconds"] for row in rows), 4)
+        scored = [row for row in rows if "processed_accuracy" in row]
+        if scored:
+            result["original_accuracy_mean"] = round(statistics.mean(row["original_accuracy"] for row in scored), 4)
+            result["processed_accuracy_mean"] = round(statistics.mean(row["processed_accuracy"] for row in scored), 4)
+        compared = [row["agreement"] for row in rows if "agreement" in row]
+        if compared:
+            result["agreement_mean"] = round(statistics.mean(compared), 4)
+
+    print(f"upload bytes: {original_bytes / 1024:.1f}KB -> {processed_bytes / 1024:.1f}KB ({result['byte_reduction']:.1%} smaller)")
+    print(f"preprocess median: {result['preprocess_median_seconds']:.3f}s")
+    if ocr is not None:
+        print(f"{engine} OCR median: {result['original_ocr_median_seconds']:.3f}s -> {result['processed_ocr_median_seconds']:.3f}s")
+        if "original_accuracy_mean" in result:
+            print(f"accuracy vs. truth files: {result['original_accuracy_mean']:.3f} -> {result['processed_accuracy_mean']:.3f}")
+        if "agreement_mean" in result:
+            print(f"agreement with original OCR (no truth file): {result['agreement_mean']:.3f}")
+
+    if args.history:
+        with open(args.history, "a", encoding="utf-8") as f:
+            f.write(json.dumps(result) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
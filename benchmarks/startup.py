@@ -0,0 +1,122 @@
+import argparse
+import ast
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(ROOT, "app.py")
+
+# Modules that should stay unloaded until their feature is used
+HEAVY_MODULES = ["langchain", "langchain_community", "mistralai", "gtts", "pytesseract", "PIL", "pypdfium2", "tiktoken", "numpy"]
+
+
+# The top-level import statements of app.py, as source code
+def app_import_source(app_path=APP_PATH):
+    with open(app_path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    return "\n".join(ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom)))
+
+
+# Run the statements in a fresh interpreter under -X importtime. Returns the
+# wall time and the cumulative import time of each top-level package.
+def measure_imports(source, python=sys.executable):
+    started_at = time.perf_counter()
+    completed = subprocess.run([python, "-X", "importtime", "-c", source], cwd=ROOT, capture_output=True, text=True)
+    wall_seconds = time.perf_counter() - started_at
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "import failed")
+
+    packages = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Top-level entries are not indented; nested imports are
+        if name.startswith(" ") and not name.startswith("  ") and cumulative.strip().isdigit():
+            package = name.strip().split(".")[0]
+            packages[package] = packages.get(package, 0) + int(cumulative) / 1e6
+    return wall_seconds, packages
+
+
+# Time the first script run and the following reruns of the app with
+# Streamlit's test runner; the API key is filled in so the whole page renders
+def measure_reruns(runs, app_path=APP_PATH):
+    from streamlit.testing.v1 import AppTest
+
+    app_test = AppTest.from_file(app_path, default_timeout=120)
+    started_at = time.perf_counter()
+    app_test.run()
+    first_run_seconds = time.perf_counter() - started_at
+    key_inputs = [widget for widget in app_test.text_input if "Mistral API Key" in widget.label]
+    if key_inputs:
+        key_inputs[0].input("benchmark").run()
+
+    timings = []
+    for _ in range(runs):
+        started_at = time.perf_counter()
+        app_test.run()
+        timings.append(time.perf_counter() - started_at)
+    if app_test.exception:
+        raise RuntimeError(app_test.exception[0].value)
+    loaded = [name for name in HEAVY_MODULES if name in sys.modules]
+    return first_run_seconds, timings, loaded
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure cold-start import time and per-rerun overhead of app.py.")
+    parser.add_argument("--reruns", type=int, default=10, help="Script reruns to time")
+    parser.add_argument("--skip-reruns", action="store_true", help="Only measure imports")
+    parser.add_argument("--top", type=int, default=10, help="Slowest packages to show")
+    parser.add_argument("--history", help="Append the result as one JSON line to this file")
+    args = parser.parse_args(argv)
+
+    # Subtract what a bare interpreter imports anyway
+    baseline_seconds, baseline_packages = measure_imports("pass")
+    wall_seconds, packages = measure_imports(app_import_source())
+    packages = {name: seconds for name, seconds in packages.items() if name not in baseline_packages}
+    result = {
+        "timestamp": time.time(),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "cold_start_seconds": round(wall_seconds, 4),
+        "interpreter_seconds": round(baseline_seconds, 4),
+        "import_seconds": round(sum(packages.values()), 4),
+        "packages": {name: round(seconds, 4) for name, seconds in sorted(packages.items(), key=lambda item: -item[1])[:args.top]},
+    }
+    if not args.skip_reruns:
+        first_run_seconds, timings, loaded = measure_reruns(args.reruns)
+        result["first_run_seconds"] = round(first_run_seconds, 4)
+        result["rerun_median_seconds"] = round(statistics.median(timings), 4)
+        result["rerun_max_seconds"] = round(max(timings), 4)
+        result["heavy_modules_loaded"] = loaded
+
+    print(f"cold start (interpreter + app imports): {result['cold_start_seconds']:.3f}s")
+    print(f"bare interpreter:                      {result['interpreter_seconds']:.3f}s")
+    print(f"app imports (-X importtime):           {result['import_seconds']:.3f}s")
+    for name, seconds in result["packages"].items():
+        print(f"  {name:<28} {seconds:.3f}s")
+    if "rerun_median_seconds" in result:
+        print(f"first script run:                      {result['first_run_seconds']:.3f}s")
+        print(f"rerun median / max:                    {result['rerun_median_seconds']:.3f}s / {result['rerun_max_seconds']:.3f}s")
+        print(f"heavy modules loaded after reruns:     {', '.join(result['heavy_modules_loaded']) or 'none'}")
+
+    if args.history:
+        with open(args.history, "a", encoding="utf-8") as f:
+            f.write(json.dumps(result) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,5 @@
+import sys
+
+from ocr_audio.cli import main
+
+sys.exit(main())
@@ -0,0 +1,229 @@
+import os
+import shutil
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+
+from fastapi import FastAPI, File, Form, Header, HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel
+
+from ocr_audio.lazy_imports import lazy_import
+from ocr_audio.pipeline import MIME_TYPES, Pipeline, Source, gtts_to_file, url_source
+from ocr_audio.qa_cache import QACache
+from ocr_audio.retrieval import HashingEmbedder, document_hash, retrieve_context
+from ocr_audio.tts_cache import make_audio_key
+from ocr_audio.tts_engine import TTS_MODEL, TTSError, concat_mp3, synthesize_stream
+from ocr_audio.uploads import SPILL_DIR, spill_upload
+
+# Caches and journals are shared with the app when both use the same folder
+OUTPUT_FOLDER = os.environ.get("OCR_AUDIO_OUTPUT", str(Path.home() / "ocr_audio_output"))
+
+VOICES = ("alloy", "echo", "fable", "onyx", "nova", "shimmer")
+
+# Offline TTS fallback, as in the app
+gtts = lazy_import("gtts")
+
+app = FastAPI(title="OCR & Audio API")
+
+
+class SummarizeRequest(BaseModel):
+    text: str
+    stream: bool = False
+
+
+class QARequest(BaseModel):
+    text: str
+    question: str
+    stream: bool = False
+    # Reuse the answer to an earlier question close in meaning (OpenAI embeddings)
+    match_similar: bool = False
+
+
+class TTSRequest(BaseModel):
+    text: str
+    voice: str = "alloy"
+
+
+# One pipeline per key pair, so clients, rate limiters and caches are built
+# once and shared by every request made with the same keys
+@lru_cache(maxsize=32)
+def get_pipeline(mistral_api_key, openai_api_key):
+    return Pipeline(OUTPUT_FOLDER, mistral_api_key=mistral_api_key, openai_api_key=openai_api_key,
+                    summarize_text=bool(openai_api_key), make_audio=True)
+
+
+@lru_cache(maxsize=32)
+def get_qa_chain(openai_api_key):
+    from ocr_audio.llm_resources import QA_TEMPLATE, build_chain, build_llm
+    return build_chain(build_llm(openai_api_key), QA_TEMPLATE)
+
+
+@lru_cache(maxsize=None)
+def get_qa_cache():
+    return QACache()
+
+
+# Local embeddings by default; similar-question matching needs OpenAI's
+@lru_cache(maxsize=32)
+def get_embedder(openai_api_key=None):
+    if openai_api_key:
+        from ocr_audio.llm_resources import OpenAIEmbedder
+        return OpenAIEmbedder(openai_api_key)
+    return HashingEmbedder()
+
+
+# Keys come from the request headers, falling back to the server's environment
+def mistral_key(header_value):
+    return header_value or os.environ.get("MISTRAL_API_KEY")
+
+
+def openai_key(header_value, required=True):
+    key = header_value or os.environ.get("OPENAI_API_KEY")
+    if required and not key:
+        raise HTTPException(status_code=400, detail="An OpenAI API key is required (X-OpenAI-Api-Key header or OPENAI_API_KEY)")
+    return key
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok"}
+
+
+# OCR an uploaded file (multipart, streamed to disk) or a URL
+@app.post("/ocr")
+async def ocr(file: UploadFile = File(None), url: str = Form(None), file_type: str = Form("auto"),
+              x_mistral_api_key: str = Header(None), x_openai_api_key: str = Header(None)):
+    if file is None and not url:
+        raise HTTPException(status_code=400, detail="Send a file or a url")
+    pipeline = await run_in_threadpool(get_pipeline, mistral_key(x_mistral_api_key), openai_key(x_openai_api_key, required=False))
+
+    # Uploads go to a directory of their own that is removed once the request is done
+    request_dir = None
+    try:
+        if file is not None:
+            mime_type = MIME_TYPES.get(os.path.splitext(file.filename or "")[1].lower())
+            if mime_type is None:
+                raise HTTPException(status_code=415, detail="Supported files are PDF, JPG and PNG")
+            os.makedirs(SPILL_DIR, exist_ok=True)
+            request_dir = tempfile.mkdtemp(prefix="api-", dir=SPILL_DIR)
+            spill_path, _, _ = await run_in_threadpool(spill_upload, file.file, file.filename, request_dir)
+            source = Source(file.filename, path=spill_path, mime_type=mime_type)
+        else:
+            source = url_source(url, file_type)
+
+        try:
+            key = await run_in_threadpool(pipeline.cache_key, source)
+            text, engine = await run_in_threadpool(pipeline.ocr, source, key)
+        except Exception as e:
+            raise HTTPException(status_code=502, detail=f"OCR failed: {e}")
+        return {"text": text, "engine": engine, "key": key}
+    finally:
+        if request_dir:
+            shutil.rmtree(request_dir, ignore_errors=True)
+
+
+@app.post("/summarize")
+async def summarize(request: SummarizeRequest, x_openai_api_key: str = Header(None)):
+    pipeline = await run_in_threadpool(get_pipeline, mistral_key(None), openai_key(x_openai_api_key))
+    if request.stream:
+        from ocr_audio.llm_resources import LLM_MODEL, LLM_TEMPERATURE, stream_chain
+        from ocr_audio.summarizer import summarize_stream
+        map_chain, reduce_chain = await run_in_threadpool(pipeline.summary_chains)
+        pieces = summarize_stream(request.text, map_chain, reduce_chain, stream_chain,
+                                  cache=pipeline.summary_cache, cache_namespace=f"{LLM_MODEL}|{LLM_TEMPERATURE}", model=LLM_MODEL)
+        return StreamingResponse(pieces, media_type="text/plain; charset=utf-8")
+    try:
+        summary = await run_in_threadpool(pipeline.summarize, request.text)
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Summarization failed: {e}")
+    return {"summary": summary}
+
+
+# Answer a question about a text; long texts are answered from their most
+# relevant chunks and repeated questions from the answer cache
+@app.post("/qa")
+async def qa(request: QARequest, x_openai_api_key: str = Header(None)):
+    from ocr_audio.llm_resources import LLM_MODEL, stream_chain
+    api_key = openai_key(x_openai_api_key)
+    embedder = await run_in_threadpool(get_embedder, api_key if request.match_similar else None)
+    qa_cache = get_qa_cache()
+    doc_key = f"{LLM_MODEL}|{embedder.name}|{document_hash(request.text)}"
+    answer, question_vector = await run_in_threadpool(qa_cache.lookup, doc_key, request.question,
+                                                      embedder if request.match_similar else None)
+    if answer is not None:
+        return {"answer": answer, "cached": True}
+
+    chain = await run_in_threadpool(get_qa_chain, api_key)
+    context = await run_in_threadpool(retrieve_context, request.text, request.question, embedder, OUTPUT_FOLDER,
+                                      question_vector=question_vector)
+    inputs = {"text": context, "question": request.question}
+    if request.stream:
+        def pieces():
+            parts = []
+            for piece in stream_chain(chain, inputs):
+                parts.append(piece)
+                yield piece
+            qa_cache.put(doc_key, request.question, "".join(parts), question_vector)
+        return StreamingResponse(pieces(), media_type="text/plain; charset=utf-8")
+    try:
+        answer = await run_in_threadpool(chain.run, inputs)
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Q&A failed: {e}")
+    qa_cache.put(doc_key, request.question, answer, question_vector)
+    return {"answer": answer, "cached": False}
+
+
+# Speech for a text, streamed as MP3 frames while later chunks are still
+# being synthesized. When OpenAI TTS fails, gTTS speaks the whole text and it
+# is sent in one piece. X-TTS-Engine names the engine used.
+@app.post("/tts")
+async def tts(request: TTSRequest, x_openai_api_key: str = Header(None)):
+    if request.voice not in VOICES:
+        raise HTTPException(status_code=400, detail=f"voice must be one of {', '.join(VOICES)}")
+    if not request.text.strip():
+        raise HTTPException(status_code=400, detail="No text to synthesize")
+    api_key = openai_key(x_openai_api_key)
+    pipeline = await run_in_threadpool(get_pipeline, mistral_key(None), api_key)
+
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as temp_file:
+        output_path = temp_file.name
+    segments = synthesize_stream(request.text, api_key, output_path, voice=request.voice, max_workers=pipeline.tts_workers,
+                                 http=pipeline.http, cache=pipeline.tts_cache)
+    # Fail over (or fail) before the response starts when the first chunk
+    # cannot be synthesized
+    try:
+        first = await run_in_threadpool(next, segments)
+    except TTSError as e:
+        try:
+            if not gtts:
+                raise HTTPException(status_code=502, detail=f"Text to speech failed: {e}")
+            try:
+                audio = await run_in_threadpool(gtts_to_file, request.text, output_path)
+            except Exception as fallback_err:
+                raise HTTPException(status_code=502, detail=f"Text to speech failed: {e}; gTTS fallback failed: {fallback_err}")
+        finally:
+            os.remove(output_path)
+        return Response(audio, media_type="audio/mpeg", headers={"X-TTS-Engine": "gtts"})
+    except Exception as e:
+        os.remove(output_path)
+        raise HTTPException(status_code=502, detail=f"Text to speech failed: {e}")
+
+    def frames():
+        try:
+            # Segments are stripped of their tags so together they form one MP3 stream
+            yield concat_mp3([first[2]])
+            for _, _, segment in segments:
+                yield concat_mp3([segment])
+        finally:
+            segments.close()
+            os.remove(output_path)
+
+    headers = {"X-Audio-Key": make_audio_key(request.text, request.voice, TTS_MODEL), "X-TTS-Engine": "openai"}
+    return StreamingResponse(frames(), media_type="audio/mpeg", headers=headers)
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host=os.environ.get("HOST", "127.0.0.1"), port=int(os.environ.get("PORT", "8000")))
@@ -0,0 +1,112 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+import weakref
+
+from ocr_audio.uploads import spill_upload
+
+# Default location and size cap for artifacts shared by all sessions
+ARTIFACT_DIR = os.path.join(tempfile.gettempdir(), "ocr_audio_artifacts")
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024 * 1024
+
+
+# Handle owned by one user session. When Streamlit drops the session state
+# holding it, the finalizer releases every artifact the session referenced.
+class SessionLease:
+    def __init__(self, store):
+        self.session_id = uuid.uuid4().hex
+        self._finalizer = weakref.finalize(self, store.release_session, self.session_id)
+
+    def close(self):
+        self._finalizer()
+
+
+# Disk-backed store for uploaded files and previews. Files are content
+# addressed so identical uploads share one copy, each session holds
+# references to the handles it uses, and a file is deleted when its last
+# session lets go of it or, least recently used first, once the store grows
+# past max_bytes. Each store keeps its files in a directory of its own under
+# root, removed when the store is garbage collected or the process exits, so
+# other stores (another server process, or the one before a cache clear that
+# running jobs still read from) are never touched.
+class ArtifactStore:
+    def __init__(self, root=ARTIFACT_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        os.makedirs(root, exist_ok=True)
+        self.root = tempfile.mkdtemp(prefix="store-", dir=root)
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.artifacts = {}
+        self._finalizer = weakref.finalize(self, shutil.rmtree, self.root, True)
+
+    def open_session(self):
+        return SessionLease(self)
+
+    # Stream a file object into the store and reference it from session_id.
+    # The handle is the file's SHA-256 followed by its extension.
+    def ingest(self, session_id, file_obj, file_name):
+        file_path, _, size = spill_upload(file_obj, file_name, spill_dir=self.root)
+        handle = os.path.basename(file_path)
+        with self.lock:
+            artifact = self.artifacts.setdefault(handle, {"size": size, "refs": set(), "last_used": 0.0})
+            artifact["refs"].add(session_id)
+            artifact["last_used"] = time.time()
+            self._evict()
+        return handle
+
+    # Path on disk for a handle, or None when it is unknown or was evicted
+    def path(self, handle):
+        with self.lock:
+            artifact = self.artifacts.get(handle) if isinstance(handle, str) else None
+            if artifact is None:
+                return None
+            artifact["last_used"] = time.time()
+        file_path = os.path.join(self.root, handle)
+        return file_path if os.path.exists(file_path) else None
+
+    # Drop a session's reference; the file is deleted once nobody holds it
+    def release(self, session_id, handle):
+        with self.lock:
+            artifact = self.artifacts.get(handle)
+            if artifact and session_id in artifact["refs"]:
+                artifact["refs"].discard(session_id)
+                if not artifact["refs"]:
+                    self._remove(handle)
+
+    # Drop every reference held by a session, e.g. on a new batch or session end
+    def release_session(self, session_id):
+        with self.lock:
+            for handle, artifact in list(self.artifacts.items()):
+                if session_id in artifact["refs"]:
+                    artifact["refs"].discard(session_id)
+                    if not artifact["refs"]:
+                        self._remove(handle)
+
+    def _remove(self, handle):
+        self.artifacts.pop(handle, None)
+        try:
+            os.remove(os.path.join(self.root, handle))
+        except OSError:
+            pass
+
+    # Called with the lock held
+    def _evict(self):
+        total = sum(artifact["size"] for artifact in self.artifacts.values())
+        if total <= self.max_bytes:
+            return
+        order = sorted(self.artifacts.items(), key=lambda item: item[1]["last_used"])
+        for handle, artifact in order:
+            self._remove(handle)
+            total -= artifact["size"]
+            if total <= self.max_bytes:
+                break
+
+    def stats(self):
+        with self.lock:
+            return {
+                "artifacts": len(self.artifacts),
+                "bytes": sum(artifact["size"] for artifact in self.artifacts.values()),
+                "referenced": sum(1 for artifact in self.artifacts.values() if artifact["refs"]),
+            }
@@ -0,0 +1,99 @@
+import argparse
+import os
+import sys
+from pathlib import Path
+
+from ocr_audio.image_preprocess import DEFAULT_MAX_LONG_EDGE
+from ocr_audio.ocr_engine import DEFAULT_MAX_IN_FLIGHT, DEFAULT_PAGES_PER_MINUTE, DEFAULT_REQUESTS_PER_SECOND
+from ocr_audio.pipeline import MANIFEST_FILENAME, Pipeline, collect_sources
+from ocr_audio.tts_engine import DEFAULT_TTS_WORKERS
+
+VOICES = ["alloy", "echo", "fable", "onyx", "nova", "shimmer"]
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m ocr_audio",
+        description="Run OCR, optional summarization and text to speech over a batch of documents."
+    )
+    parser.add_argument("inputs", nargs="+",
+                        help="Files, directories (searched recursively), URLs, or .txt/.lst files listing paths and URLs")
+    parser.add_argument("-o", "--output", default=str(Path.home() / "ocr_audio_output"), help="Output folder")
+    parser.add_argument("--file-type", choices=["auto", "pdf", "image"], default="auto",
+                        help="Document type of URLs; auto uses the URL's extension")
+    parser.add_argument("--mistral-api-key", default=os.environ.get("MISTRAL_API_KEY"),
+                        help="Defaults to $MISTRAL_API_KEY")
+    parser.add_argument("--openai-api-key", default=os.environ.get("OPENAI_API_KEY"),
+                        help="Defaults to $OPENAI_API_KEY; needed for summaries and OpenAI speech")
+    parser.add_argument("--summarize", action="store_true", help="Write a summary of every document")
+    parser.add_argument("--audio", action="store_true", help="Write an MP3 of every document")
+    parser.add_argument("--audio-source", choices=["text", "summary"], default="text",
+                        help="Read the full text or the summary aloud")
+    parser.add_argument("--voice", choices=VOICES, default="alloy")
+    parser.add_argument("-j", "--max-in-flight", type=int, default=DEFAULT_MAX_IN_FLIGHT,
+                        help="Documents processed at the same time")
+    parser.add_argument("--tts-workers", type=int, default=DEFAULT_TTS_WORKERS,
+                        help="Concurrent speech requests per document")
+    parser.add_argument("--requests-per-second", type=float, default=DEFAULT_REQUESTS_PER_SECOND,
+                        help="Mistral OCR request budget")
+    parser.add_argument("--pages-per-minute", type=int, default=DEFAULT_PAGES_PER_MINUTE,
+                        help="Mistral OCR page budget")
+    parser.add_argument("--extract-images", action="store_true", help="Save embedded page images")
+    parser.add_argument("--max-long-edge", type=int, default=DEFAULT_MAX_LONG_EDGE,
+                        help="Downscale local images so their longer side is at most this many pixels before upload")
+    parser.add_argument("--no-preprocess", action="store_true",
+                        help="Upload local images as they are instead of shrinking and recompressing them")
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or write the caches in the output folder")
+    parser.add_argument("--no-resume", action="store_true",
+                        help="Redo every stage instead of skipping those a previous run finished")
+    parser.add_argument("--no-fallback", action="store_true", help="Do not fall back to pytesseract and gTTS")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.audio_source == "summary" and not args.summarize:
+        args.summarize = True
+    if args.summarize and not args.openai_api_key:
+        print("error: --summarize needs an OpenAI API key", file=sys.stderr)
+        return 2
+
+    try:
+        sources = collect_sources(args.inputs, args.file_type)
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    if not sources:
+        print("error: no supported documents found", file=sys.stderr)
+        return 2
+
+    pipeline = Pipeline(
+        args.output,
+        mistral_api_key=args.mistral_api_key,
+        openai_api_key=args.openai_api_key,
+        summarize_text=args.summarize,
+        make_audio=args.audio,
+        audio_source=args.audio_source,
+        voice=args.voice,
+        max_in_flight=args.max_in_flight,
+        tts_workers=args.tts_workers,
+        requests_per_second=args.requests_per_second,
+        pages_per_minute=args.pages_per_minute,
+        use_cache=not args.no_cache,
+        extract_images=args.extract_images,
+        use_fallbacks=not args.no_fallback,
+        resume=not args.no_resume,
+        preprocess_images=not args.no_preprocess,
+        max_long_edge=args.max_long_edge,
+    )
+
+    def report(record, done, total):
+        status = record["status"] if record["error"] is None else f"{record['status']} ({record['error']})"
+        if record.get("resumed"):
+            status += f", resumed {'/'.join(record['resumed'])}"
+        print(f"[{done}/{total}] {record['source']['label']}: {status}", file=sys.stderr)
+
+    records = pipeline.run(sources, on_record=report)
+    failed = sum(1 for record in records if record["status"] != "done")
+    print(f"{len(records) - failed} done, {failed} failed; manifest: {os.path.join(args.output, MANIFEST_FILENAME)}", file=sys.stderr)
+    return 1 if failed else 0
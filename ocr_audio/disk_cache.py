@@ -0,0 +1,88 @@
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+# Caches live in this folder inside the output folder
+CACHE_DIRNAME = ".cache"
+
+
+# SQLite connection that commits on success and is always closed
+@contextmanager
+def sqlite_connection(db_path):
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+# SQLite-backed key/value cache with a TTL and size-bounded LRU eviction.
+# Values may be text or bytes. Subclasses pick the file and table name.
+class DiskCache:
+    FILENAME = "cache.sqlite"
+    TABLE = "cache"
+
+    def __init__(self, folder_path, max_bytes, ttl_seconds=None):
+        self.cache_dir = os.path.join(folder_path, CACHE_DIRNAME)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.db_path = os.path.join(self.cache_dir, self.FILENAME)
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        with sqlite_connection(self.db_path) as conn:
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.TABLE} ("
+                "key TEXT PRIMARY KEY, result NOT NULL, size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{self.TABLE}_accessed ON {self.TABLE} (accessed_at)")
+
+    # Return the cached value for key, or None when missing or expired
+    def get(self, key):
+        now = time.time()
+        with self.lock, sqlite_connection(self.db_path) as conn:
+            row = conn.execute(f"SELECT result, created_at FROM {self.TABLE} WHERE key = ?", (key,)).fetchone()
+            if row is None or (self.ttl_seconds and now - row[1] > self.ttl_seconds):
+                if row is not None:
+                    conn.execute(f"DELETE FROM {self.TABLE} WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+            conn.execute(f"UPDATE {self.TABLE} SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return row[0]
+
+    def put(self, key, value):
+        now = time.time()
+        size = len(value.encode("utf-8")) if isinstance(value, str) else len(value)
+        with self.lock, sqlite_connection(self.db_path) as conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO {self.TABLE} (key, result, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now),
+            )
+            self._evict(conn, now)
+
+    def _evict(self, conn, now):
+        if self.ttl_seconds:
+            conn.execute(f"DELETE FROM {self.TABLE} WHERE created_at < ?", (now - self.ttl_seconds,))
+        total = conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {self.TABLE}").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in conn.execute(f"SELECT key, size FROM {self.TABLE} ORDER BY accessed_at").fetchall():
+            conn.execute(f"DELETE FROM {self.TABLE} WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def clear(self):
+        with self.lock, sqlite_connection(self.db_path) as conn:
+            conn.execute(f"DELETE FROM {self.TABLE}")
+
+    def stats(self):
+        with self.lock, sqlite_connection(self.db_path) as conn:
+            entries, total = conn.execute(f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.TABLE}").fetchone()
+        return {"entries": entries, "bytes": total, "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,39 @@
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# (connect, read) timeouts in seconds; speech for a long chunk can take a while
+DEFAULT_TIMEOUT = (5, 120)
+DEFAULT_RETRIES = 3
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+# requests.Session that applies a default timeout to every request
+class TimeoutSession(requests.Session):
+    def __init__(self, timeout=DEFAULT_TIMEOUT):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return super().request(method, url, **kwargs)
+
+
+# Keep-alive session whose connection pool should hold the peak number of
+# concurrent requests. Connection errors and 429/5xx responses are retried with
+# backoff, honouring Retry-After. POST is included because a speech request
+# has no side effects and can be sent again safely.
+def create_session(pool_size=4, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES):
+    retry = Retry(
+        total=retries,
+        backoff_factor=0.5,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=frozenset({"GET", "POST"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = TimeoutSession(timeout)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
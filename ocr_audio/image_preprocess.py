@@ -0,0 +1,128 @@
+import os
+import tempfile
+
+from ocr_audio.disk_cache import CACHE_DIRNAME
+from ocr_audio.lazy_imports import lazy_import
+
+# Pillow, loaded on first use
+Image = lazy_import("PIL.Image")
+ImageOps = lazy_import("PIL.ImageOps")
+ImageStat = lazy_import("PIL.ImageStat")
+
+PREPROCESS_DIRNAME = "preprocessed"
+
+# OCR accuracy holds up well at this size; phone photos are often 4000px+
+DEFAULT_MAX_LONG_EDGE = 2000
+
+# Scans are rarely worth more than this for OCR
+DEFAULT_MAX_DPI = 300
+
+# Photos whose mean saturation is below this are treated as grayscale documents
+GRAYSCALE_SATURATION = 24
+
+JPEG_QUALITY = 85
+
+EXIF_ORIENTATION = 0x0112
+
+
+# Settings string for cache keys, so results for differently prepared
+# versions of the same file are kept apart
+def preprocess_options(max_long_edge=DEFAULT_MAX_LONG_EDGE, max_dpi=DEFAULT_MAX_DPI, grayscale=True):
+    return f"prep:{max_long_edge}:{max_dpi}:{int(grayscale)}"
+
+
+def is_available():
+    return bool(Image)
+
+
+def preprocess_dir(folder_path):
+    return os.path.join(folder_path, CACHE_DIRNAME, PREPROCESS_DIRNAME)
+
+
+# Whether an image is effectively black and white text on paper
+def looks_grayscale(image):
+    sample = image.convert("RGB")
+    sample.thumbnail((256, 256))
+    saturation = ImageStat.Stat(sample.convert("HSV").getchannel("S")).mean[0]
+    return saturation < GRAYSCALE_SATURATION
+
+
+# Flatten transparency onto white; JPEG has no alpha, and transparent pixels
+# would otherwise turn black and swallow dark text
+def flatten_alpha(image):
+    if image.mode == "P" and "transparency" in image.info:
+        image = image.convert("RGBA")
+    if image.mode not in ("RGBA", "LA", "PA", "RGBa", "La"):
+        return image
+    background = Image.new("RGB", image.size, "white")
+    background.paste(image.convert("RGB"), mask=image.convert("RGBA").getchannel("A"))
+    return background
+
+
+# Scale factor that brings the image under both the long-edge and DPI limits
+def target_scale(image, max_long_edge, max_dpi):
+    scale = 1.0
+    if max_long_edge:
+        scale = min(scale, max_long_edge / max(image.size))
+    dpi = image.info.get("dpi")
+    if max_dpi and dpi and dpi[0]:
+        scale = min(scale, max_dpi / float(dpi[0]))
+    return scale
+
+
+# Prepare a photo or scan for OCR upload: apply the EXIF orientation,
+# downscale to max_long_edge / max_dpi, drop colour from pages that are
+# effectively grayscale and re-encode as JPEG. The result is cached in the
+# output folder, named by content hash and settings so it is made once per
+# file. The original is kept when it cannot be read or processing would
+# not make it smaller.
+# Returns (path, mime type, stats).
+def preprocess_image(file_path, content_hash, mime_type, folder_path, max_long_edge=DEFAULT_MAX_LONG_EDGE,
+                     max_dpi=DEFAULT_MAX_DPI, grayscale=True):
+    output_dir = preprocess_dir(folder_path)
+    original_bytes = os.path.getsize(file_path)
+    options = preprocess_options(max_long_edge, max_dpi, grayscale)
+    output_path = os.path.join(output_dir, f"{content_hash}-{options.replace(':', '_')}.jpg")
+    if os.path.exists(output_path):
+        return output_path, "image/jpeg", {"original_bytes": original_bytes, "processed_bytes": os.path.getsize(output_path), "reused": True}
+
+    try:
+        source = Image.open(file_path)
+    except OSError:
+        # Not something Pillow can read; let the OCR service decide what to make of it
+        return file_path, mime_type, {"original_bytes": original_bytes, "processed_bytes": original_bytes, "reused": False}
+
+    with source:
+        original_size = source.size
+        rotated = source.getexif().get(EXIF_ORIENTATION, 1) != 1
+        image = ImageOps.exif_transpose(source)
+        scale = target_scale(image, max_long_edge, max_dpi)
+        if scale < 1.0:
+            image = image.resize((max(1, round(image.width * scale)), max(1, round(image.height * scale))), Image.LANCZOS)
+        image = flatten_alpha(image)
+        if image.mode == "L" or (grayscale and looks_grayscale(image)):
+            image = image.convert("L")
+        elif image.mode != "RGB":
+            image = image.convert("RGB")
+
+        os.makedirs(output_dir, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=output_dir, suffix=".part", delete=False) as temp_file:
+            image.save(temp_file, format="JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+            temp_path = temp_file.name
+
+    stats = {
+        "original_bytes": original_bytes,
+        "processed_bytes": os.path.getsize(temp_path),
+        "original_size": original_size,
+        "processed_size": image.size,
+        "rotated": rotated,
+        "grayscale": image.mode == "L",
+        "reused": False,
+    }
+    # A small, already compressed file can come out larger; keep it unless it had to be rotated
+    if stats["processed_bytes"] >= original_bytes and not rotated:
+        os.remove(temp_path)
+        stats["processed_bytes"] = original_bytes
+        return file_path, mime_type, stats
+    os.replace(temp_path, output_path)
+    return output_path, "image/jpeg", stats
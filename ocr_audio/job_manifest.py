@@ -0,0 +1,128 @@
+import json
+import os
+import threading
+import time
+import uuid
+
+from ocr_audio.disk_cache import sqlite_connection
+
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+# Keys per query when looking up many documents, under SQLite's variable limit
+KEYS_PER_QUERY = 500
+
+# Folder in the output folder where the app keeps the text of finished documents
+TEXT_DIRNAME = "ocr_text"
+
+
+# Journal of batch work kept in SQLite in the output folder. Every document
+# (identified by its content key) has one row per stage with the stage's
+# status, the path of the artifact it produced and the engine that produced
+# it, written as soon as the stage changes state. A stage counts as complete
+# only when it finished and its artifact is still on disk, so a rerun after a
+# crash redoes exactly the stages that did not finish. Callers can also ask
+# for stages finished by particular engines, so output of a fallback engine
+# is kept but redone once the preferred one is reachable again. Batches
+# record which documents were submitted together so an interrupted batch can
+# be restored.
+class JobManifest:
+    FILENAME = "jobs.sqlite"
+
+    def __init__(self, folder_path):
+        os.makedirs(folder_path, exist_ok=True)
+        self.db_path = os.path.join(folder_path, self.FILENAME)
+        self.lock = threading.Lock()
+        with sqlite_connection(self.db_path) as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS stages ("
+                "doc_key TEXT NOT NULL, stage TEXT NOT NULL, status TEXT NOT NULL, artifact_path TEXT, "
+                "error TEXT, updated_at REAL NOT NULL, engine TEXT, PRIMARY KEY (doc_key, stage))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS batches ("
+                "batch_id TEXT PRIMARY KEY, created_at REAL NOT NULL, origin TEXT NOT NULL, documents TEXT NOT NULL)"
+            )
+
+    def _set(self, doc_key, stage, status, artifact_path=None, error=None, engine=None):
+        with self.lock, sqlite_connection(self.db_path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO stages (doc_key, stage, status, artifact_path, error, updated_at, engine) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (doc_key, stage, status, artifact_path, error, time.time(), engine),
+            )
+
+    def start(self, doc_key, stage):
+        self._set(doc_key, stage, STATUS_RUNNING)
+
+    def finish(self, doc_key, stage, artifact_path=None, engine=None):
+        self._set(doc_key, stage, STATUS_DONE, artifact_path, engine=engine)
+
+    def fail(self, doc_key, stage, error):
+        self._set(doc_key, stage, STATUS_FAILED, error=str(error))
+
+    # Artifact path of a finished stage, or None when the stage has not
+    # finished, its artifact was deleted since, or (when engines is given) it
+    # was produced by an engine not in engines. Stages finished without an
+    # engine match any engine.
+    def completed_path(self, doc_key, stage, engines=None):
+        return self.completed_paths([doc_key], stage, engines)[doc_key]
+
+    # completed_path() for many documents over one connection, as {doc key: path or None}
+    def completed_paths(self, doc_keys, stage, engines=None):
+        doc_keys = list(doc_keys)
+        rows = []
+        with self.lock, sqlite_connection(self.db_path) as conn:
+            for start in range(0, len(doc_keys), KEYS_PER_QUERY):
+                batch = doc_keys[start:start + KEYS_PER_QUERY]
+                rows += conn.execute(
+                    f"SELECT doc_key, status, artifact_path, engine FROM stages "
+                    f"WHERE stage = ? AND doc_key IN ({', '.join('?' * len(batch))})",
+                    [stage] + batch,
+                ).fetchall()
+        paths = dict.fromkeys(doc_keys)
+        for doc_key, status, artifact_path, engine in rows:
+            if status != STATUS_DONE or not artifact_path or not os.path.exists(artifact_path):
+                continue
+            if engines is not None and engine is not None and engine not in engines:
+                continue
+            paths[doc_key] = artifact_path
+        return paths
+
+    # {stage: {"status", "artifact_path", "error", "updated_at", "engine"}} for one document
+    def stages(self, doc_key):
+        with self.lock, sqlite_connection(self.db_path) as conn:
+            rows = conn.execute(
+                "SELECT stage, status, artifact_path, error, updated_at, engine FROM stages WHERE doc_key = ?", (doc_key,)
+            ).fetchall()
+        return {
+            row[0]: {"status": row[1], "artifact_path": row[2], "error": row[3], "updated_at": row[4], "engine": row[5]}
+            for row in rows
+        }
+
+    # Record the documents (a list of JSON-serializable dicts) of a new batch.
+    # origin names the writer ("app", "pipeline"), since each stores its own
+    # document fields and only reads back its own batches.
+    def start_batch(self, documents, origin):
+        batch_id = uuid.uuid4().hex
+        with self.lock, sqlite_connection(self.db_path) as conn:
+            conn.execute(
+                "INSERT INTO batches (batch_id, created_at, origin, documents) VALUES (?, ?, ?, ?)",
+                (batch_id, time.time(), origin, json.dumps(documents, ensure_ascii=False)),
+            )
+        return batch_id
+
+    # (batch id, documents) of the most recent batch from origin, or None
+    def last_batch(self, origin):
+        with self.lock, sqlite_connection(self.db_path) as conn:
+            row = conn.execute(
+                "SELECT batch_id, documents FROM batches WHERE origin = ? ORDER BY created_at DESC LIMIT 1", (origin,)
+            ).fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+
+    # Number of stage rows in each status
+    def stats(self):
+        with self.lock, sqlite_connection(self.db_path) as conn:
+            rows = conn.execute("SELECT status, COUNT(*) FROM stages GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
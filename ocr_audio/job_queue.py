@@ -0,0 +1,172 @@
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_JOB_WORKERS = 2
+
+# Finished jobs kept for polling before the oldest are dropped
+DEFAULT_MAX_FINISHED = 200
+
+STATE_QUEUED = "queued"
+STATE_RUNNING = "running"
+STATE_DONE = "done"
+STATE_FAILED = "failed"
+STATE_CANCELLED = "cancelled"
+FINISHED_STATES = (STATE_DONE, STATE_FAILED, STATE_CANCELLED)
+
+
+class JobCancelled(Exception):
+    pass
+
+
+# One unit of background work. The job function receives it as its first
+# argument and reports through update() and add_partial(); update() raises
+# JobCancelled once cancellation was requested so the function stops at its
+# next checkpoint.
+class Job:
+    def __init__(self, kind, label=""):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.label = label
+        self.state = STATE_QUEUED
+        self.done = 0
+        self.total = 0
+        self.message = ""
+        self.messages = []
+        self.partial = []
+        self.first_partial_at = None
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_requested = False
+        self.lock = threading.Lock()
+
+    def update(self, done=None, total=None, message=None):
+        with self.lock:
+            if done is not None:
+                self.done = done
+            if total is not None:
+                self.total = total
+            if message is not None:
+                self.message = message
+        if self.cancel_requested:
+            raise JobCancelled()
+
+    # Keep a note (e.g. a fallback warning) to show when the job is polled
+    def note(self, message):
+        with self.lock:
+            self.messages.append(message)
+
+    # Intermediate output available before the job finishes, e.g. audio parts
+    def add_partial(self, item):
+        with self.lock:
+            if not self.partial:
+                self.first_partial_at = time.time()
+            self.partial.append(item)
+
+    @property
+    def finished(self):
+        return self.state in FINISHED_STATES
+
+    # Point-in-time copy of the job's progress, safe to read from the UI
+    def snapshot(self):
+        with self.lock:
+            return {
+                "id": self.id,
+                "kind": self.kind,
+                "label": self.label,
+                "state": self.state,
+                "done": self.done,
+                "total": self.total,
+                "message": self.message,
+                "messages": list(self.messages),
+                "partial": list(self.partial),
+                "error": self.error,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "first_partial_at": self.first_partial_at,
+                "finished_at": self.finished_at,
+            }
+
+
+# In-process job queue: a small thread pool that runs submitted jobs in the
+# background and keeps their status and results for polling. It lives in
+# st.cache_resource, so jobs keep running through reruns and can be picked
+# up again by id from any rerun of the session that submitted them.
+class JobQueue:
+    def __init__(self, max_workers=DEFAULT_JOB_WORKERS, max_finished=DEFAULT_MAX_FINISHED):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ocr-audio-job")
+        self.max_finished = max_finished
+        self.jobs = OrderedDict()
+        self.lock = threading.Lock()
+
+    # Queue fn(job, *args, **kwargs) and return the job id
+    def submit(self, kind, fn, *args, label="", **kwargs):
+        job = Job(kind, label)
+        with self.lock:
+            self.jobs[job.id] = job
+            self._prune()
+        self.executor.submit(self._run, job, fn, args, kwargs)
+        return job.id
+
+    def _run(self, job, fn, args, kwargs):
+        if job.cancel_requested:
+            self._finish(job, STATE_CANCELLED)
+            return
+        with job.lock:
+            job.state = STATE_RUNNING
+            job.started_at = time.time()
+        try:
+            result = fn(job, *args, **kwargs)
+        except JobCancelled:
+            self._finish(job, STATE_CANCELLED)
+        except Exception as e:
+            traceback.print_exc()
+            self._finish(job, STATE_FAILED, error=f"{type(e).__name__}: {e}")
+        else:
+            self._finish(job, STATE_DONE, result=result)
+
+    def _finish(self, job, state, result=None, error=None):
+        with job.lock:
+            job.result = result
+            job.error = error
+            job.state = state
+            job.finished_at = time.time()
+
+    # Drop the oldest finished jobs past max_finished; running ones are kept
+    def _prune(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self.jobs[job_id]
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    # Snapshot of a job's status, or None when the id is unknown
+    def status(self, job_id):
+        job = self.get(job_id)
+        return job.snapshot() if job else None
+
+    # Result of a finished job, or None while it is still running
+    def result(self, job_id):
+        job = self.get(job_id)
+        return job.result if job and job.state == STATE_DONE else None
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job and not job.finished:
+            job.cancel_requested = True
+
+    def stats(self):
+        with self.lock:
+            jobs = list(self.jobs.values())
+        counts = {}
+        for job in jobs:
+            counts[job.state] = counts.get(job.state, 0) + 1
+        return counts
@@ -0,0 +1,49 @@
+import importlib
+import importlib.util
+import sys
+import threading
+
+
+# Stand-in for a heavy optional module. The real module is imported on first
+# attribute access, so an import at the top of a file costs nothing until the
+# feature that needs it is used. Truth-testing checks whether the module is
+# installed without importing it, which keeps the repo's "X = None when
+# missing" checks (`if not X:`) working.
+class LazyModule:
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._available = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __bool__(self):
+        if self._available is None:
+            if self._name in sys.modules:
+                self._available = True
+                return True
+            try:
+                self._available = importlib.util.find_spec(self._name) is not None
+            except (ImportError, ValueError):
+                self._available = False
+        return self._available
+
+    @property
+    def loaded(self):
+        return self._module is not None
+
+    def __repr__(self):
+        return f"<lazy module {self._name!r}{' (loaded)' if self.loaded else ''}>"
+
+
+def lazy_import(name):
+    return LazyModule(name)
@@ -0,0 +1,67 @@
+import time
+
+# LangChain takes seconds to import, so it is imported inside the functions
+# below and only loads when a summary, answer or embedding is first needed
+
+LLM_MODEL = "gpt-3.5-turbo"
+LLM_TEMPERATURE = 0
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+SUMMARY_TEMPLATE = "Summarize the following content:\n\n{text}"
+COMBINE_TEMPLATE = "The following are summaries of consecutive parts of one document. Combine them into a single coherent summary:\n\n{text}"
+QA_TEMPLATE = "Given the following context:\n\n{text}\n\nAnswer this question:\n\n{question}"
+
+
+# Chat model client; meant to be built once per (key, model, temperature)
+def build_llm(api_key, model=LLM_MODEL, temperature=LLM_TEMPERATURE):
+    from langchain.chat_models import ChatOpenAI
+    return ChatOpenAI(openai_api_key=api_key, model=model, temperature=temperature)
+
+
+# Prompt + LLM chain; the variables are read from the template
+def build_chain(llm, template):
+    from langchain.chains import LLMChain
+    from langchain.prompts import PromptTemplate
+    prompt = PromptTemplate.from_template(template)
+    return LLMChain(llm=llm, prompt=prompt)
+
+
+# Yield a chain's completion piece by piece as tokens arrive from the model
+def stream_chain(chain, inputs):
+    prompt_text = chain.prompt.format(**inputs)
+    for chunk in chain.llm.stream(prompt_text):
+        piece = getattr(chunk, "content", chunk)
+        if piece:
+            yield piece
+
+
+# Wraps a token stream and records time to first token and total time
+class StreamTimer:
+    def __init__(self, pieces):
+        self.pieces = pieces
+        self.first_token_seconds = None
+        self.total_seconds = None
+
+    def __iter__(self):
+        started_at = time.perf_counter()
+        for piece in self.pieces:
+            if self.first_token_seconds is None:
+                self.first_token_seconds = time.perf_counter() - started_at
+            yield piece
+        self.total_seconds = time.perf_counter() - started_at
+
+
+# OpenAI embeddings with the name used to tell persisted indexes apart
+class OpenAIEmbedder:
+    semantic = True
+
+    def __init__(self, api_key, model=EMBEDDING_MODEL):
+        from langchain_community.embeddings import OpenAIEmbeddings
+        self.name = f"openai-{model}"
+        self.embeddings = OpenAIEmbeddings(openai_api_key=api_key, model=model)
+
+    def embed_documents(self, texts):
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text):
+        return self.embeddings.embed_query(text)
@@ -0,0 +1,40 @@
+import hashlib
+from urllib.parse import urlsplit, urlunsplit
+
+from ocr_audio.disk_cache import DiskCache
+
+DEFAULT_MAX_BYTES = 500 * 1024 * 1024
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+
+
+# Lowercase scheme and host and drop the fragment so equivalent URLs share a key
+def normalize_url(url):
+    parts = urlsplit(url.strip())
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, parts.query, ""))
+
+
+# Content address for a document: SHA-256 of its bytes (or normalized URL)
+# combined with the model name and any options that change the output.
+# content_hash is the hex SHA-256 of the bytes, when already computed.
+def make_key(model, file_bytes=None, url=None, options="", content_hash=None):
+    digest = hashlib.sha256()
+    if content_hash is None and file_bytes is not None:
+        content_hash = hashlib.sha256(file_bytes).hexdigest()
+    if content_hash is not None:
+        digest.update(f"bytes:{content_hash}".encode("utf-8"))
+    else:
+        digest.update(b"url:")
+        digest.update(normalize_url(url or "").encode("utf-8"))
+    digest.update(f"|model:{model}|options:{options}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+# Persistent OCR result cache stored in SQLite under the output folder.
+# Entries expire after ttl_seconds and the least recently used ones are
+# evicted once the stored text exceeds max_bytes.
+class OCRCache(DiskCache):
+    FILENAME = "ocr_cache.sqlite"
+    TABLE = "ocr_cache"
+
+    def __init__(self, folder_path, max_bytes=DEFAULT_MAX_BYTES, ttl_seconds=DEFAULT_TTL_SECONDS):
+        super().__init__(folder_path, max_bytes, ttl_seconds)
@@ -0,0 +1,87 @@
+import base64
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+OCR_MODEL = "mistral-ocr-latest"
+
+# Default number of OCR requests allowed in flight at the same time
+DEFAULT_MAX_IN_FLIGHT = 4
+
+# Default request budget for the shared Mistral rate limiter
+DEFAULT_REQUESTS_PER_SECOND = 1.0
+DEFAULT_PAGES_PER_MINUTE = 600
+
+
+# Pages in a Mistral OCR response
+def get_pages(ocr_response):
+    return ocr_response.pages if hasattr(ocr_response, "pages") else (ocr_response if isinstance(ocr_response, list) else [])
+
+
+# Join the markdown of every page in a Mistral OCR response
+def extract_text(ocr_response):
+    pages = get_pages(ocr_response)
+    return "\n\n".join(page.markdown for page in pages) or "No result found."
+
+
+# Write the embedded page images of an OCR response to folder_path, one
+# image at a time, and drop the base64 payload from the response object so
+# it does not stay in memory. Returns the saved file paths.
+def save_page_images(ocr_response, folder_path):
+    saved_paths = []
+    for page in get_pages(ocr_response):
+        for image in getattr(page, "images", None) or []:
+            encoded = getattr(image, "image_base64", None)
+            if not encoded:
+                continue
+            header, _, data = encoded.partition(",") if encoded.startswith("data:") else ("", "", encoded)
+            extension = header[len("data:image/"):].split(";")[0] if header.startswith("data:image/") else ""
+            filename = image.id if extension == "" or os.path.splitext(image.id)[1] else f"{image.id}.{extension}"
+
+            os.makedirs(folder_path, exist_ok=True)
+            file_path = os.path.join(folder_path, os.path.basename(filename))
+            with open(file_path, "wb") as f:
+                f.write(base64.b64decode(data))
+            image.image_base64 = None
+            saved_paths.append(file_path)
+    return saved_paths
+
+
+# Run Mistral OCR on a single document and return the extracted text.
+# When a RateLimiter is given the call waits for budget, retries 429/5xx
+# and charges the number of pages that came back. Embedded page images are
+# only requested when image_folder is set, and are then written to disk.
+def run_ocr(client, document, model=OCR_MODEL, limiter=None, image_folder=None):
+    include_images = image_folder is not None
+    if limiter is None:
+        ocr_response = client.ocr.process(model=model, document=document, include_image_base64=include_images)
+    else:
+        ocr_response = limiter.call(client.ocr.process, model=model, document=document, include_image_base64=include_images, pages=1)
+        limiter.record_pages(len(get_pages(ocr_response)), prepaid=1)
+    if include_images:
+        save_page_images(ocr_response, image_folder)
+    return extract_text(ocr_response)
+
+
+# Run process_fn over the documents with at most max_in_flight calls at once.
+# Yields (index, result, error) as each document finishes so the caller can
+# report progress; results must be placed by index to keep input order.
+# If the caller stops iterating (e.g. a cancelled job), documents not yet
+# started are dropped; only the calls already in flight run to completion.
+def dispatch_ocr(documents, process_fn, max_in_flight=DEFAULT_MAX_IN_FLIGHT):
+    if not documents:
+        return
+
+    workers = max(1, min(int(max_in_flight), len(documents)))
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        futures = {executor.submit(process_fn, document): idx for idx, document in enumerate(documents)}
+        for future in as_completed(futures):
+            idx = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                yield idx, None, e
+            else:
+                yield idx, result, None
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
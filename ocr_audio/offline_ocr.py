@@ -0,0 +1,88 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from ocr_audio.lazy_imports import lazy_import
+
+# Offline OCR (using pytesseract), loaded on first use
+pytesseract = lazy_import("pytesseract")
+Image = lazy_import("PIL.Image")
+
+# PDF rasterization for offline OCR of PDFs
+pdfium = lazy_import("pypdfium2")
+
+# Tesseract is most accurate on text rendered at around 300 DPI
+DEFAULT_DPI = 300
+DEFAULT_LANG = "eng"
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+# Whether a document of this type can be OCR'd offline
+def is_available(mime_type):
+    if not pytesseract:
+        return False
+    return bool(pdfium) if mime_type == "application/pdf" else True
+
+
+def page_count(file_path):
+    pdf = pdfium.PdfDocument(file_path)
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
+
+
+# Render one PDF page to a PIL image at the given resolution
+def render_page(file_path, page_index, dpi=DEFAULT_DPI):
+    pdf = pdfium.PdfDocument(file_path)
+    try:
+        page = pdf[page_index]
+        try:
+            return page.render(scale=dpi / 72).to_pil()
+        finally:
+            page.close()
+    finally:
+        pdf.close()
+
+
+# Worker: rasterize and OCR a single PDF page. Each worker opens the file
+# itself so only the path crosses the process boundary, not the image.
+def _ocr_pdf_page(file_path, page_index, dpi, lang):
+    image = render_page(file_path, page_index, dpi)
+    try:
+        return pytesseract.image_to_string(image, lang=lang)
+    finally:
+        image.close()
+
+
+def _ocr_image(file_path, lang):
+    with Image.open(file_path) as image:
+        return pytesseract.image_to_string(image, lang=lang)
+
+
+# Process pool shared by every offline OCR call, one worker per CPU
+def get_process_pool(max_workers=None):
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=max_workers or os.cpu_count() or 1)
+        return _pool
+
+
+# OCR a local PDF or image with tesseract. PDF pages are rasterized and
+# recognized in parallel across the process pool, and their text is joined
+# in page order.
+def ocr_file(file_path, mime_type, dpi=DEFAULT_DPI, lang=DEFAULT_LANG, pool=None):
+    if not pytesseract:
+        raise RuntimeError("pytesseract is not installed")
+    pool = pool or get_process_pool()
+    if mime_type != "application/pdf":
+        return pool.submit(_ocr_image, file_path, lang).result()
+    if not pdfium:
+        raise RuntimeError("pypdfium2 is needed to OCR PDFs offline")
+
+    count = page_count(file_path)
+    futures = [pool.submit(_ocr_pdf_page, file_path, page_index, dpi, lang) for page_index in range(count)]
+    return "\n\n".join(future.result().strip() for future in futures) or "No result found."
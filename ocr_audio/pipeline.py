@@ -0,0 +1,392 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+
+from ocr_audio import image_preprocess, offline_ocr
+from ocr_audio.http_client import create_session
+from ocr_audio.job_manifest import JobManifest
+from ocr_audio.lazy_imports import lazy_import
+from ocr_audio.ocr_cache import OCRCache, make_key
+from ocr_audio.ocr_engine import DEFAULT_MAX_IN_FLIGHT, DEFAULT_PAGES_PER_MINUTE, DEFAULT_REQUESTS_PER_SECOND, OCR_MODEL, dispatch_ocr, run_ocr
+from ocr_audio.rate_limiter import RateLimiter
+from ocr_audio.tts_cache import TTSCache
+from ocr_audio.tts_engine import DEFAULT_TTS_WORKERS, TTSError, max_connections, synthesize
+from ocr_audio.uploads import delete_uploaded_file, prepare_local_document
+
+# Mistral OCR; without it only the offline fallback is available
+mistralai = lazy_import("mistralai")
+
+# Offline TTS Fallback (using gTTS)
+gtts = lazy_import("gtts")
+
+# File types the pipeline can OCR, by extension
+MIME_TYPES = {
+    ".pdf": "application/pdf",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".png": "image/png",
+}
+
+# Text files given as input list one path or URL per line
+LIST_EXTENSIONS = (".txt", ".lst")
+
+MANIFEST_FILENAME = "manifest.json"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+UNSAFE_NAME_CHARS = re.compile(r"[^\w.-]+")
+
+
+# Function to save file to a specified folder
+def save_file(content, filename, folder_path, file_type="binary"):
+    try:
+        # Create folder if it doesn't exist
+        os.makedirs(folder_path, exist_ok=True)
+
+        # Full path for the file
+        file_path = os.path.join(folder_path, filename)
+
+        # Write file content
+        if file_type == "text":
+            with open(file_path, 'w', encoding='utf-8') as f:
+                f.write(content)
+        else:  # binary content
+            with open(file_path, 'wb') as f:
+                f.write(content)
+
+        return True, file_path
+    except Exception as e:
+        return False, str(e)
+
+
+def is_url(value):
+    return urlsplit(value).scheme in ("http", "https")
+
+
+# One document to process: a local file or a URL
+class Source:
+    def __init__(self, label, path=None, url=None, mime_type=None):
+        self.label = label
+        self.path = path
+        self.url = url
+        self.mime_type = mime_type
+
+    @property
+    def is_pdf(self):
+        return self.mime_type == "application/pdf"
+
+    def to_dict(self):
+        return {"label": self.label, "path": self.path, "url": self.url, "mime_type": self.mime_type}
+
+
+# Source for a URL; file_type is "pdf", "image" or "auto" (from the extension)
+def url_source(url, file_type="auto"):
+    if file_type == "auto":
+        extension = os.path.splitext(urlsplit(url).path)[1].lower()
+        mime_type = MIME_TYPES.get(extension, "application/pdf")
+    else:
+        mime_type = "application/pdf" if file_type == "pdf" else "image/jpeg"
+    return Source(url, url=url, mime_type=mime_type)
+
+
+def file_source(path):
+    mime_type = MIME_TYPES.get(os.path.splitext(path)[1].lower())
+    return Source(os.path.basename(path), path=os.path.abspath(path), mime_type=mime_type) if mime_type else None
+
+
+# Expand directories, list files and URLs into sources, in a stable order.
+# Directories are searched recursively for supported files; list files hold
+# one path or URL per line, blank lines and # comments are skipped.
+def collect_sources(inputs, file_type="auto"):
+    sources = []
+    for item in inputs:
+        item = item.strip()
+        if not item:
+            continue
+        if is_url(item):
+            sources.append(url_source(item, file_type))
+        elif os.path.isdir(item):
+            for root, dirs, files in os.walk(item):
+                dirs.sort()
+                for name in sorted(files):
+                    source = file_source(os.path.join(root, name))
+                    if source:
+                        sources.append(source)
+        elif item.lower().endswith(LIST_EXTENSIONS):
+            with open(item, encoding="utf-8") as f:
+                lines = [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+            sources.extend(collect_sources(lines, file_type))
+        else:
+            source = file_source(item)
+            if source is None:
+                raise ValueError(f"Unsupported input: {item}")
+            sources.append(source)
+    return sources
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# Synthesize text with gTTS into output_path and return the MP3 bytes
+def gtts_to_file(text, output_path, lang="en"):
+    if not gtts:
+        raise RuntimeError("gTTS is not installed")
+    gtts.gTTS(text=text, lang=lang).save(output_path)
+    with open(output_path, "rb") as f:
+        return f.read()
+
+
+# Headless OCR -> summary -> audio pipeline over a batch of sources. Every
+# document gets <name>.txt, and optionally <name>.summary.txt and
+# <name>.mp3, in the output folder; run() also writes a manifest of what was
+# produced for each source. Stage progress is journaled in the output
+# folder, and with resume on a rerun skips every stage that already finished.
+class Pipeline:
+    def __init__(self, output_folder, mistral_api_key=None, openai_api_key=None, summarize_text=False, make_audio=False,
+                 audio_source="text", voice="alloy", max_in_flight=DEFAULT_MAX_IN_FLIGHT, tts_workers=DEFAULT_TTS_WORKERS,
+                 requests_per_second=DEFAULT_REQUESTS_PER_SECOND, pages_per_minute=DEFAULT_PAGES_PER_MINUTE,
+                 use_cache=True, extract_images=False, use_fallbacks=True, resume=True, preprocess_images=True,
+                 max_long_edge=image_preprocess.DEFAULT_MAX_LONG_EDGE):
+        self.output_folder = output_folder
+        self.openai_api_key = openai_api_key
+        self.summarize_text = summarize_text
+        self.make_audio = make_audio
+        self.audio_source = audio_source
+        self.voice = voice
+        self.max_in_flight = max_in_flight
+        self.tts_workers = tts_workers
+        self.extract_images = extract_images
+        self.use_fallbacks = use_fallbacks
+        self.resume = resume
+        self.preprocess_images = preprocess_images and image_preprocess.is_available()
+        self.max_long_edge = max_long_edge
+        os.makedirs(output_folder, exist_ok=True)
+        self.jobs = JobManifest(output_folder)
+
+        self.client = mistralai.Mistral(api_key=mistral_api_key) if (mistralai and mistral_api_key) else None
+        self.limiter = RateLimiter(requests_per_second=requests_per_second, pages_per_minute=pages_per_minute)
+        self.ocr_cache = OCRCache(output_folder) if use_cache else None
+        self.tts_cache = TTSCache(output_folder) if (use_cache and make_audio) else None
+        # Up to max_in_flight documents are spoken at once, each with its own TTS workers
+        self.http = create_session(pool_size=max_connections(tts_workers) * max_in_flight) if make_audio else None
+
+        self.summary_cache = None
+        if summarize_text and use_cache:
+            from ocr_audio.summarizer import SummaryCache
+            self.summary_cache = SummaryCache(output_folder)
+        self._summary_chains = None
+        self._summary_chains_lock = threading.Lock()
+
+    # Whether a local image is shrunk and recompressed before upload
+    def preprocesses(self, source):
+        return self.preprocess_images and bool(source.path) and not source.is_pdf
+
+    def cache_key(self, source):
+        content_hash = file_sha256(source.path) if source.path else None
+        options = ["images"] if self.extract_images else []
+        if self.preprocesses(source):
+            options.append(image_preprocess.preprocess_options(self.max_long_edge))
+        return make_key(OCR_MODEL, content_hash=content_hash, url=source.url, options=",".join(options))
+
+    # Base name of the output files: source name plus a short content key,
+    # so equal file names from different folders do not overwrite each other
+    def output_stem(self, source, key):
+        name = os.path.splitext(os.path.basename(urlsplit(source.url).path) if source.url else source.label)[0]
+        return f"{UNSAFE_NAME_CHARS.sub('_', name).strip('_') or 'document'}-{key[:10]}"
+
+    # OCR one source, returning (text, engine); Mistral first, tesseract for
+    # local files when Mistral is unavailable or fails
+    def ocr(self, source, key):
+        if self.ocr_cache:
+            cached = self.ocr_cache.get(key)
+            if cached is not None:
+                return cached, "cache"
+
+        error = None
+        if self.client is not None:
+            file_id = None
+            try:
+                if source.url:
+                    document_type = "document_url" if source.is_pdf else "image_url"
+                    document = {"type": document_type, document_type: source.url}
+                else:
+                    path, mime_type = source.path, source.mime_type
+                    if self.preprocesses(source):
+                        path, mime_type, _ = image_preprocess.preprocess_image(path, key, mime_type, self.output_folder,
+                                                                               max_long_edge=self.max_long_edge)
+                    document, file_id = prepare_local_document(self.client, path, source.label, mime_type)
+                image_folder = os.path.join(self.output_folder, "page_images", key[:16]) if self.extract_images else None
+                text = run_ocr(self.client, document, limiter=self.limiter, image_folder=image_folder)
+                if self.ocr_cache:
+                    self.ocr_cache.put(key, text)
+                return text, "mistral"
+            except Exception as e:
+                error = e
+            finally:
+                delete_uploaded_file(self.client, file_id)
+
+        if self.use_fallbacks and source.path and offline_ocr.is_available(source.mime_type):
+            return offline_ocr.ocr_file(source.path, source.mime_type), "tesseract"
+        raise error or RuntimeError("No OCR engine available: set a Mistral API key or install pytesseract")
+
+    # (map chain, reduce chain) for summaries, built on first use: LangChain
+    # is slow to import and only needed once a summary is asked for
+    def summary_chains(self):
+        with self._summary_chains_lock:
+            if self._summary_chains is None:
+                from ocr_audio.llm_resources import COMBINE_TEMPLATE, SUMMARY_TEMPLATE, build_chain, build_llm
+                llm = build_llm(self.openai_api_key)
+                self._summary_chains = (build_chain(llm, SUMMARY_TEMPLATE), build_chain(llm, COMBINE_TEMPLATE))
+            return self._summary_chains
+
+    def summarize(self, text):
+        from ocr_audio.llm_resources import LLM_MODEL, LLM_TEMPERATURE
+        from ocr_audio.summarizer import summarize
+        map_chain, reduce_chain = self.summary_chains()
+        return summarize(text, map_chain, reduce_chain, cache=self.summary_cache,
+                         cache_namespace=f"{LLM_MODEL}|{LLM_TEMPERATURE}", model=LLM_MODEL)
+
+    # Write the audio for text to output_path, returning the engine used
+    def speak(self, text, output_path):
+        error = None
+        if self.openai_api_key:
+            try:
+                audio = synthesize(text, self.openai_api_key, voice=self.voice, max_workers=self.tts_workers,
+                                   http=self.http, cache=self.tts_cache)
+                success, result = save_file(audio, os.path.basename(output_path), os.path.dirname(output_path))
+                if not success:
+                    raise OSError(result)
+                return "openai"
+            except TTSError as e:
+                error = e
+        if self.use_fallbacks and gtts:
+            gtts_to_file(text, output_path)
+            return "gtts"
+        raise error or RuntimeError("No TTS engine available: set an OpenAI API key or install gTTS")
+
+    # Run one stage unless the journal shows it already finished with its
+    # artifact still on disk (and, when engines is given, by one of those
+    # engines). fn() does the work and returns (artifact path, engine).
+    # Returns (artifact path, whether it was resumed).
+    def run_stage(self, key, stage, fn, engines=None, resume=True):
+        if self.resume and resume:
+            artifact_path = self.jobs.completed_path(key, stage, engines)
+            if artifact_path:
+                return artifact_path, True
+        self.jobs.start(key, stage)
+        try:
+            artifact_path, engine = fn()
+        except Exception as e:
+            self.jobs.fail(key, stage, f"{type(e).__name__}: {e}")
+            raise
+        self.jobs.finish(key, stage, artifact_path, engine)
+        return artifact_path, False
+
+    # Run every stage for one source and return its manifest record
+    def process(self, source):
+        started_at = time.time()
+        record = {"source": source.to_dict(), "status": "failed", "error": None, "resumed": []}
+        try:
+            key = self.cache_key(source)
+            stem = self.output_stem(source, key)
+            record["key"] = key
+
+            def ocr_stage():
+                text, record["ocr_engine"] = self.ocr(source, key)
+                return self.write_text(text, f"{stem}.txt"), record["ocr_engine"]
+
+            # Tesseract text is kept, but Mistral is tried again on the next run
+            # while a Mistral client is configured
+            ocr_engines = ("mistral", "cache") if self.client is not None else None
+            record["text_path"], ocr_resumed = self.run_stage(key, "ocr", ocr_stage, engines=ocr_engines)
+            if ocr_resumed:
+                record["resumed"].append("ocr")
+
+            # Later stages were built from the journaled text; new text redoes them
+            # (their caches keep that cheap when the text did not change)
+            if self.summarize_text:
+                def summary_stage():
+                    return self.write_text(self.summarize(read_text(record["text_path"])), f"{stem}.summary.txt"), "openai"
+
+                record["summary_path"], resumed = self.run_stage(key, "summary", summary_stage, resume=ocr_resumed)
+                if resumed:
+                    record["resumed"].append("summary")
+
+            if self.make_audio:
+                spoken_path = record["summary_path"] if self.audio_source == "summary" and self.summarize_text else record["text_path"]
+
+                def audio_stage():
+                    audio_path = os.path.join(self.output_folder, f"{stem}.mp3")
+                    record["tts_engine"] = self.speak(read_text(spoken_path), audio_path)
+                    return audio_path, record["tts_engine"]
+
+                # The voice and the text read aloud are part of the stage, so changing them redoes it
+                audio_stage_name = f"audio:{self.voice}:{self.audio_source}"
+                record["audio_path"], resumed = self.run_stage(key, audio_stage_name, audio_stage, resume=ocr_resumed)
+                if resumed:
+                    record["resumed"].append("audio")
+            record["status"] = "done"
+        except Exception as e:
+            record["error"] = f"{type(e).__name__}: {e}"
+        record["seconds"] = round(time.time() - started_at, 3)
+        return record
+
+    def write_text(self, text, filename):
+        success, result = save_file(text, filename, self.output_folder, file_type="text")
+        if not success:
+            raise OSError(result)
+        return result
+
+    # Process all sources with at most max_in_flight documents at once and
+    # write the manifest. on_record(record, done, total) is called as each
+    # document finishes. Records are returned in input order.
+    def run(self, sources, on_record=None):
+        started_at = time.time()
+        self.jobs.start_batch([source.to_dict() for source in sources], origin="pipeline")
+        records = [None] * len(sources)
+        done = 0
+        for idx, record, error in dispatch_ocr(sources, self.process, max_in_flight=self.max_in_flight):
+            if error is not None:
+                record = {"source": sources[idx].to_dict(), "status": "failed", "error": f"{type(error).__name__}: {error}"}
+            records[idx] = record
+            done += 1
+            if on_record:
+                on_record(record, done, len(sources))
+
+        manifest = {
+            "started_at": started_at,
+            "finished_at": time.time(),
+            "settings": {
+                "summarize": self.summarize_text,
+                "audio": self.make_audio,
+                "audio_source": self.audio_source,
+                "voice": self.voice,
+                "max_in_flight": self.max_in_flight,
+                "extract_images": self.extract_images,
+            },
+            "documents": records,
+        }
+        write_manifest(manifest, os.path.join(self.output_folder, MANIFEST_FILENAME))
+        return records
+
+
+def read_text(file_path):
+    with open(file_path, encoding="utf-8") as f:
+        return f.read()
+
+
+# Write the manifest atomically so a reader never sees a partial file
+def write_manifest(manifest, file_path):
+    with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=os.path.dirname(file_path), suffix=".tmp", delete=False) as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+        temp_path = f.name
+    os.replace(temp_path, file_path)
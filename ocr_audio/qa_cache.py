@@ -0,0 +1,90 @@
+import re
+import threading
+from collections import OrderedDict
+
+from ocr_audio.lazy_imports import lazy_import
+
+# NumPy is only needed once a question is asked
+np = lazy_import("numpy")
+
+DEFAULT_MAX_ENTRIES = 1000
+
+# Cosine similarity above which two questions on one document count as the same
+DEFAULT_SIMILARITY_THRESHOLD = 0.92
+
+PUNCTUATION = re.compile(r"[^\w\s]")
+
+
+# Lowercase, drop punctuation and collapse whitespace
+def normalize_question(question):
+    return " ".join(PUNCTUATION.sub(" ", question.lower()).split())
+
+
+# In-memory answer cache keyed by (document hash, normalized question).
+# When a semantic embedder is given, a question that misses the exact lookup
+# is compared with earlier questions on the same document and the answer is
+# reused if their similarity reaches the threshold. Embedders without
+# `semantic = True` (the local hashing one) are never used for matching.
+class QACache:
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, similarity_threshold=DEFAULT_SIMILARITY_THRESHOLD):
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _unit(vector):
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    # Return (answer or None, question vector or None); the vector can be
+    # passed to put() so the question is not embedded twice
+    def lookup(self, doc_hash, question, embedder=None):
+        key = (doc_hash, normalize_question(question))
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry["answer"], entry["vector"]
+
+        vector = None
+        if embedder is not None and getattr(embedder, "semantic", False) and self.similarity_threshold:
+            vector = self._unit(embedder.embed_query(question))
+            with self.lock:
+                best_key, best_score = None, self.similarity_threshold
+                for entry_key, entry in self.entries.items():
+                    if entry_key[0] != doc_hash or entry["vector"] is None or entry["vector"].shape != vector.shape:
+                        continue
+                    score = float(entry["vector"] @ vector)
+                    if score >= best_score:
+                        best_key, best_score = entry_key, score
+                if best_key is not None:
+                    self.entries.move_to_end(best_key)
+                    self.semantic_hits += 1
+                    return self.entries[best_key]["answer"], vector
+
+        with self.lock:
+            self.misses += 1
+        return None, vector
+
+    def put(self, doc_hash, question, answer, vector=None):
+        key = (doc_hash, normalize_question(question))
+        with self.lock:
+            self.entries[key] = {"answer": answer, "vector": self._unit(vector) if vector is not None else None}
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def stats(self):
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "hits": self.hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+            }
@@ -0,0 +1,216 @@
+import random
+import re
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+# Status codes worth retrying: rate limited or a transient server error
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Headers that tell us how long to wait before the next request
+RETRY_AFTER_HEADERS = ("retry-after-ms", "retry-after", "x-ratelimit-reset-requests", "x-ratelimit-reset")
+
+# Duration strings like "6m0s" or "250ms" used by rate limit reset headers
+DURATION_PATTERN = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+DURATION_UNITS = {"h": 3600, "m": 60, "s": 1, "ms": 0.001}
+
+
+# Classic token bucket: refills at `rate` tokens per second up to `capacity`.
+# Tokens may go negative when usage is recorded after the fact (e.g. pages
+# of a PDF are only known once the OCR response arrives).
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    # Block until `amount` tokens are available, then take them
+    def acquire(self, amount=1):
+        amount = min(float(amount), self.capacity)
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                wait = (amount - self.tokens) / self.rate
+            time.sleep(wait)
+
+    # Take tokens without waiting, allowing the bucket to go into debt
+    def consume(self, amount):
+        with self.lock:
+            self._refill()
+            self.tokens -= float(amount)
+
+    def set_rate(self, rate):
+        with self.lock:
+            self._refill()
+            self.rate = float(rate)
+
+    def available(self):
+        with self.lock:
+            self._refill()
+            return self.tokens
+
+
+# Find the HTTP status code on an exception raised by an SDK or requests
+def get_status_code(error):
+    status = getattr(error, "status_code", None)
+    if status is None:
+        response = getattr(error, "raw_response", None) or getattr(error, "response", None)
+        status = getattr(response, "status_code", None)
+    try:
+        return int(status) if status is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+# Parse durations such as "1.5", "20ms", "6m0s" or an HTTP date into seconds
+def parse_wait_seconds(value, header=""):
+    value = str(value).strip()
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+        return seconds / 1000 if header.endswith("-ms") else seconds
+    except ValueError:
+        pass
+
+    parts = DURATION_PATTERN.findall(value)
+    if parts and "".join(number + unit for number, unit in parts) == value:
+        return sum(float(number) * DURATION_UNITS[unit] for number, unit in parts)
+
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+# Read the server-requested wait time from the headers attached to an error
+def get_retry_after(error):
+    response = getattr(error, "raw_response", None) or getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or getattr(error, "headers", None)
+    if not headers:
+        return None
+    for header in RETRY_AFTER_HEADERS:
+        value = headers.get(header)
+        if value is not None:
+            seconds = parse_wait_seconds(value, header)
+            if seconds is not None:
+                return seconds
+    return None
+
+
+# Shared limiter for API calls: a requests-per-second bucket plus an optional
+# pages-per-minute budget. Retries 429/5xx with exponential backoff and
+# jitter, honours Retry-After, and halves the request rate on 429 before
+# creeping back up to the configured rate on success.
+class RateLimiter:
+    def __init__(self, requests_per_second=1.0, pages_per_minute=None, burst=None,
+                 max_retries=5, base_delay=1.0, max_delay=60.0, min_rate=0.05):
+        self.max_rate = float(requests_per_second)
+        self.min_rate = min(float(min_rate), self.max_rate)
+        self.request_bucket = TokenBucket(self.max_rate, burst or max(1.0, self.max_rate))
+        self.page_bucket = TokenBucket(pages_per_minute / 60.0, pages_per_minute) if pages_per_minute else None
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.lock = threading.Lock()
+        self.cooldown_until = 0.0
+        self.in_flight = 0
+        self.stats = {"calls": 0, "retries": 0, "throttled": 0, "server_errors": 0, "failures": 0, "pages": 0}
+
+    def _wait_for_cooldown(self):
+        while True:
+            with self.lock:
+                wait = self.cooldown_until - time.monotonic()
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    def _backoff_delay(self, attempt):
+        delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return random.uniform(delay / 2, delay)
+
+    def _on_throttled(self, delay):
+        with self.lock:
+            self.stats["throttled"] += 1
+            self.cooldown_until = max(self.cooldown_until, time.monotonic() + delay)
+            new_rate = max(self.min_rate, self.request_bucket.rate / 2)
+        self.request_bucket.set_rate(new_rate)
+
+    def _on_success(self):
+        with self.lock:
+            self.stats["calls"] += 1
+            new_rate = min(self.max_rate, self.request_bucket.rate + self.max_rate * 0.1)
+        self.request_bucket.set_rate(new_rate)
+
+    # Wait for request and page budget before a call
+    def acquire(self, pages=1):
+        self._wait_for_cooldown()
+        if self.page_bucket:
+            self.page_bucket.acquire(pages)
+        self.request_bucket.acquire(1)
+
+    # Charge pages that were only known after the response arrived,
+    # minus the pages already paid for when the call was admitted
+    def record_pages(self, pages, prepaid=0):
+        with self.lock:
+            self.stats["pages"] += pages
+        if self.page_bucket and pages > prepaid:
+            self.page_bucket.consume(pages - prepaid)
+
+    # Call fn under the limiter, retrying rate limit and server errors
+    def call(self, fn, *args, pages=1, **kwargs):
+        attempt = 0
+        while True:
+            self.acquire(pages)
+            with self.lock:
+                self.in_flight += 1
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                status = get_status_code(e)
+                if status not in RETRY_STATUS_CODES or attempt >= self.max_retries:
+                    with self.lock:
+                        self.stats["failures"] += 1
+                    raise
+                delay = get_retry_after(e)
+                if delay is None:
+                    delay = self._backoff_delay(attempt)
+                delay = min(delay, self.max_delay)
+                if status == 429:
+                    self._on_throttled(delay)
+                else:
+                    with self.lock:
+                        self.stats["server_errors"] += 1
+                    time.sleep(delay)
+                with self.lock:
+                    self.stats["retries"] += 1
+                attempt += 1
+            else:
+                self._on_success()
+                return result
+            finally:
+                with self.lock:
+                    self.in_flight -= 1
+
+    # Snapshot of the limiter for display and tuning
+    def state(self):
+        with self.lock:
+            state = dict(self.stats)
+            state["in_flight"] = self.in_flight
+            state["cooldown_remaining"] = round(max(0.0, self.cooldown_until - time.monotonic()), 2)
+        state["max_rate"] = self.max_rate
+        state["current_rate"] = round(self.request_bucket.rate, 3)
+        state["request_tokens"] = round(self.request_bucket.available(), 2)
+        if self.page_bucket:
+            state["page_tokens"] = round(self.page_bucket.available(), 2)
+        return state
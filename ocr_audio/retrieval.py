@@ -0,0 +1,124 @@
+import hashlib
+import os
+import re
+
+from ocr_audio.disk_cache import CACHE_DIRNAME
+from ocr_audio.lazy_imports import lazy_import
+from ocr_audio.text_chunking import normalize_text, split_stable
+
+# NumPy is only needed once a question is asked
+np = lazy_import("numpy")
+
+# Retrieval chunks: small enough that top-k of them is far less than the document
+CHUNK_CHARS = 800
+MAX_CHUNK_CHARS = 1500
+DEFAULT_TOP_K = 4
+
+# Below this size the whole text is cheaper than retrieval
+MIN_RETRIEVAL_CHARS = 6000
+
+INDEX_DIRNAME = "vectors"
+EMBED_BATCH_SIZE = 64
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+# Offline stand-in for an embedding model: hashed bag of words and word
+# bigrams, L2-normalized. Deterministic and dependency-free, good enough for
+# keyword-heavy questions and for running without network access.
+class HashingEmbedder:
+    name = "hashing-512"
+    # Word overlap is not meaning: "revenue in 2021" and "revenue in 2022"
+    # hash almost alike, so these vectors must not decide that two questions
+    # are the same
+    semantic = False
+
+    def __init__(self, dimensions=512):
+        self.dimensions = dimensions
+
+    def _embed(self, text):
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        words = TOKEN_PATTERN.findall(text.lower())
+        for term in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+            digest = hashlib.md5(term.encode("utf-8")).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dimensions
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        return vector
+
+    def embed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+# In-process vector index over the chunks of one document. Vectors are
+# normalized so a dot product gives cosine similarity.
+class VectorIndex:
+    def __init__(self, chunks, vectors):
+        self.chunks = list(chunks)
+        # An empty document has no vectors to take the width from
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(self.chunks), -1 if self.chunks else 0)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        self.vectors = vectors / np.where(norms == 0, 1, norms)
+
+    @classmethod
+    def build(cls, text, embedder):
+        chunks = split_stable(text, CHUNK_CHARS, MAX_CHUNK_CHARS)
+        vectors = []
+        for start in range(0, len(chunks), EMBED_BATCH_SIZE):
+            vectors.extend(embedder.embed_documents(chunks[start:start + EMBED_BATCH_SIZE]))
+        return cls(chunks, vectors)
+
+    def save(self, file_path):
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        temp_path = f"{file_path}.tmp.npz"
+        np.savez(temp_path, vectors=self.vectors, chunks=np.array(self.chunks, dtype=str))
+        os.replace(temp_path, file_path)
+
+    @classmethod
+    def load(cls, file_path):
+        with np.load(file_path, allow_pickle=False) as data:
+            return cls(data["chunks"].tolist(), data["vectors"])
+
+    # Indices of the k chunks most similar to the query vector, best first
+    def search(self, query_vector, k=DEFAULT_TOP_K):
+        if not self.chunks:
+            return []
+        query = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        scores = self.vectors @ (query / norm if norm else query)
+        k = min(k, len(self.chunks))
+        top = np.argpartition(-scores, k - 1)[:k]
+        return top[np.argsort(-scores[top])].tolist()
+
+
+# Document hash used to name the persisted index
+def document_hash(text):
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+# Load the index for text from the folder, or build and persist it
+def get_or_build_index(text, embedder, folder_path):
+    file_name = f"{document_hash(text)[:32]}-{embedder.name}.npz"
+    file_path = os.path.join(folder_path, CACHE_DIRNAME, INDEX_DIRNAME, file_name)
+    if os.path.exists(file_path):
+        try:
+            return VectorIndex.load(file_path)
+        except (OSError, ValueError, KeyError):
+            pass
+    index = VectorIndex.build(text, embedder)
+    index.save(file_path)
+    return index
+
+
+# Context for a question: the whole text when it is short, otherwise the
+# top-k most relevant chunks in document order
+def retrieve_context(text, question, embedder, folder_path, k=DEFAULT_TOP_K, question_vector=None):
+    if len(text) <= MIN_RETRIEVAL_CHARS:
+        return text
+    index = get_or_build_index(text, embedder, folder_path)
+    if question_vector is None:
+        question_vector = embedder.embed_query(question)
+    top = sorted(index.search(question_vector, k))
+    return "\n\n".join(index.chunks[idx] for idx in top)
@@ -0,0 +1,166 @@
+import hashlib
+import math
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from ocr_audio.disk_cache import DiskCache
+from ocr_audio.lazy_imports import lazy_import
+from ocr_audio.text_chunking import split_stable
+
+# Optional exact token counting
+tiktoken = lazy_import("tiktoken")
+
+# Texts up to this many tokens are summarized in one call
+MAX_INPUT_TOKENS = 12000
+
+# Longer texts are split into chunks of about this many tokens, each one
+# starting with the tail of the previous chunk for context
+CHUNK_TOKENS = 3000
+OVERLAP_TOKENS = 200
+
+# Rough size of a token when tiktoken is not installed
+CHARS_PER_TOKEN = 4
+
+# Chunks are larger than TTS chunks, so content-defined boundaries are rarer
+SUMMARY_BOUNDARY_MODULUS = 16
+
+DEFAULT_SUMMARY_WORKERS = 4
+DEFAULT_MAX_BYTES = 100 * 1024 * 1024
+
+
+# Persistent cache of chunk and partial summaries
+class SummaryCache(DiskCache):
+    FILENAME = "summary_cache.sqlite"
+    TABLE = "summary_cache"
+
+    def __init__(self, folder_path, max_bytes=DEFAULT_MAX_BYTES):
+        super().__init__(folder_path, max_bytes)
+
+
+# tiktoken encoding for a model, or None when tiktoken is missing or cannot
+# load its encoding files (they are downloaded on first use)
+@lru_cache(maxsize=None)
+def get_encoding(model=None):
+    if not tiktoken:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model) if model else tiktoken.get_encoding("cl100k_base")
+    except KeyError:
+        return get_encoding(None) if model else None
+    except Exception:
+        return None
+
+
+def count_tokens(text, model=None):
+    encoding = get_encoding(model)
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+# Stable chunks of about chunk_tokens, each prefixed with the end of the
+# previous chunk so ideas that straddle a boundary are not lost
+def make_chunks(text, chunk_tokens=CHUNK_TOKENS, overlap_tokens=OVERLAP_TOKENS):
+    target_chars = chunk_tokens * CHARS_PER_TOKEN
+    chunks = split_stable(text, target_chars, int(target_chars * 1.5), SUMMARY_BOUNDARY_MODULUS)
+    if not overlap_tokens:
+        return chunks
+    overlap_chars = overlap_tokens * CHARS_PER_TOKEN
+    overlapped = chunks[:1]
+    for previous, chunk in zip(chunks, chunks[1:]):
+        # Start the overlap on a word boundary
+        tail = previous[-overlap_chars:].split(" ", 1)[-1]
+        overlapped.append(f"{tail}\n\n{chunk}")
+    return overlapped
+
+
+# Run a chain on one text, going through the cache when one is given
+def run_cached(chain, text, stage, cache=None, cache_namespace=""):
+    key = hashlib.sha256(f"{cache_namespace}|{stage}|{text}".encode("utf-8")).hexdigest() if cache is not None else None
+    if key:
+        result = cache.get(key)
+        if result is not None:
+            return result
+    result = chain.run({"text": text})
+    if key:
+        cache.put(key, result)
+    return result
+
+
+# Group texts so that each group fits in max_tokens, with at least two
+# texts per group so every reduce round makes progress
+def pack_groups(texts, max_tokens, model=None):
+    groups = []
+    current = []
+    current_tokens = 0
+    for text in texts:
+        tokens = count_tokens(text, model)
+        if len(current) >= 2 and current_tokens + tokens > max_tokens:
+            groups.append(current)
+            current, current_tokens = [], 0
+        current.append(text)
+        current_tokens += tokens
+    if current:
+        if len(current) == 1 and groups:
+            groups[-1].append(current[0])
+        else:
+            groups.append(current)
+    return groups
+
+
+# Stream a chain's output through stream_fn(chain, inputs), caching the
+# joined result once it is complete; a cached result is yielded whole
+def run_cached_stream(chain, text, stage, stream_fn, cache=None, cache_namespace=""):
+    key = hashlib.sha256(f"{cache_namespace}|{stage}|{text}".encode("utf-8")).hexdigest() if cache is not None else None
+    if key:
+        result = cache.get(key)
+        if result is not None:
+            yield result
+            return
+    pieces = []
+    for piece in stream_fn(chain, {"text": text}):
+        pieces.append(piece)
+        yield piece
+    if key:
+        cache.put(key, "".join(pieces))
+
+
+# Run the map and intermediate reduce rounds and return the (chain, text,
+# stage) of the final call. Short texts go straight to a single call.
+def prepare_final_call(text, map_chain, reduce_chain, cache, cache_namespace, max_workers, model,
+                       max_input_tokens, chunk_tokens, overlap_tokens):
+    if count_tokens(text, model) <= max_input_tokens:
+        return map_chain, text, "single"
+
+    chunks = make_chunks(text, chunk_tokens, overlap_tokens)
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(chunks)))) as executor:
+        summaries = list(executor.map(lambda chunk: run_cached(map_chain, chunk, "map", cache, cache_namespace), chunks))
+
+        # Reduce in rounds until everything fits into one call
+        while len(summaries) > 1 and count_tokens("\n\n".join(summaries), model) > max_input_tokens:
+            groups = pack_groups(summaries, max_input_tokens, model)
+            summaries = list(executor.map(
+                lambda group: run_cached(reduce_chain, "\n\n".join(group), "reduce", cache, cache_namespace), groups
+            ))
+
+    return reduce_chain, "\n\n".join(summaries), "reduce"
+
+
+# Map-reduce summarization. Short texts take one call; longer ones are split
+# into overlapping chunks summarized concurrently, then the summaries are
+# combined hierarchically until they fit in one final call. Every call is
+# cached, so after a small edit only the changed chunks are re-summarized.
+def summarize(text, map_chain, reduce_chain, cache=None, cache_namespace="", max_workers=DEFAULT_SUMMARY_WORKERS,
+              model=None, max_input_tokens=MAX_INPUT_TOKENS, chunk_tokens=CHUNK_TOKENS, overlap_tokens=OVERLAP_TOKENS):
+    chain, final_text, stage = prepare_final_call(text, map_chain, reduce_chain, cache, cache_namespace, max_workers, model,
+                                                  max_input_tokens, chunk_tokens, overlap_tokens)
+    return run_cached(chain, final_text, stage, cache, cache_namespace)
+
+
+# Same as summarize, but yields the final summary piece by piece as
+# stream_fn(chain, inputs) produces it
+def summarize_stream(text, map_chain, reduce_chain, stream_fn, cache=None, cache_namespace="", max_workers=DEFAULT_SUMMARY_WORKERS,
+                     model=None, max_input_tokens=MAX_INPUT_TOKENS, chunk_tokens=CHUNK_TOKENS, overlap_tokens=OVERLAP_TOKENS):
+    chain, final_text, stage = prepare_final_call(text, map_chain, reduce_chain, cache, cache_namespace, max_workers, model,
+                                                  max_input_tokens, chunk_tokens, overlap_tokens)
+    yield from run_cached_stream(chain, final_text, stage, stream_fn, cache, cache_namespace)
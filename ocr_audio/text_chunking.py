@@ -0,0 +1,77 @@
+import hashlib
+import re
+import unicodedata
+
+SENTENCE_END = re.compile(r"(?<=[.!?;:])\s+")
+
+# A paragraph whose hash is divisible by this always ends a chunk, so chunk
+# boundaries re-synchronise right after an edited paragraph
+DEFAULT_BOUNDARY_MODULUS = 4
+
+
+# Normalize whitespace so whitespace-only edits produce the same chunks and keys
+def normalize_text(text):
+    text = unicodedata.normalize("NFC", text)
+    lines = [re.sub(r"[ \t]+", " ", line).strip() for line in text.strip().splitlines()]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines))
+
+
+# Split text into pieces no longer than max_chars, preferring paragraph
+# breaks, then sentence ends, then spaces
+def split_text(text, max_chars):
+    chunks = []
+    current = ""
+
+    def add(piece, separator):
+        nonlocal current
+        if not current:
+            current = piece
+        elif len(current) + len(separator) + len(piece) <= max_chars:
+            current = f"{current}{separator}{piece}"
+        else:
+            chunks.append(current)
+            current = piece
+
+    for paragraph in re.split(r"\n\s*\n", text.strip()):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) <= max_chars:
+            add(paragraph, "\n\n")
+            continue
+        for sentence in SENTENCE_END.split(paragraph):
+            while len(sentence) > max_chars:
+                cut = sentence.rfind(" ", 0, max_chars)
+                cut = cut if cut > 0 else max_chars
+                add(sentence[:cut].strip(), " ")
+                sentence = sentence[cut:].strip()
+            if sentence:
+                add(sentence, " ")
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+# Content-defined chunking: paragraphs (split further if over max_chars) are
+# grouped up to target_chars, and a chunk also ends after any paragraph
+# whose hash is divisible by boundary_modulus. Editing one paragraph
+# therefore only changes the chunk around it, which keeps chunk-level
+# caches useful.
+def split_stable(text, target_chars, max_chars, boundary_modulus=DEFAULT_BOUNDARY_MODULUS):
+    chunks = []
+    current = []
+    current_len = 0
+    for paragraph in re.split(r"\n\s*\n", normalize_text(text)):
+        for unit in split_text(paragraph, max_chars):
+            if current and current_len + 2 + len(unit) > max_chars:
+                chunks.append("\n\n".join(current))
+                current, current_len = [], 0
+            current.append(unit)
+            current_len += len(unit) + (2 if current_len else 0)
+            boundary = int(hashlib.sha1(unit.encode("utf-8")).hexdigest()[:8], 16) % boundary_modulus == 0
+            if current_len >= target_chars or boundary:
+                chunks.append("\n\n".join(current))
+                current, current_len = [], 0
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
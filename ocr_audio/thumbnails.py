@@ -0,0 +1,55 @@
+import os
+import tempfile
+
+from ocr_audio.disk_cache import CACHE_DIRNAME
+from ocr_audio.lazy_imports import lazy_import
+
+# PDF rasterization for page thumbnails
+pdfium = lazy_import("pypdfium2")
+
+THUMBNAIL_DIRNAME = "thumbnails"
+
+# Low-resolution JPEGs keep one page to a few tens of kilobytes
+THUMBNAIL_WIDTH = 360
+THUMBNAIL_QUALITY = 70
+
+# Pages shown at a time in a paginated preview
+PAGES_PER_VIEW = 4
+
+
+def is_available():
+    return bool(pdfium)
+
+
+def thumbnail_dir(folder_path, content_hash):
+    return os.path.join(folder_path, CACHE_DIRNAME, THUMBNAIL_DIRNAME, content_hash[:32])
+
+
+# Paths of the thumbnails for the given page indices, rendering only the
+# ones not already on disk. Thumbnails are keyed by the PDF's content hash
+# and width, so each page is rendered once per file.
+def get_thumbnails(pdf_path, content_hash, folder_path, page_indices, width=THUMBNAIL_WIDTH):
+    target_dir = thumbnail_dir(folder_path, content_hash)
+    paths = [os.path.join(target_dir, f"page-{page_index + 1:04d}-w{width}.jpg") for page_index in page_indices]
+    missing = [(page_index, path) for page_index, path in zip(page_indices, paths) if not os.path.exists(path)]
+    if not missing:
+        return paths
+
+    os.makedirs(target_dir, exist_ok=True)
+    pdf = pdfium.PdfDocument(pdf_path)
+    try:
+        for page_index, path in missing:
+            page = pdf[page_index]
+            try:
+                scale = width / page.get_width()
+                image = page.render(scale=scale).to_pil().convert("RGB")
+            finally:
+                page.close()
+            # Write under a temporary name so a reader never sees half a file
+            with tempfile.NamedTemporaryFile(dir=target_dir, suffix=".part", delete=False) as temp_file:
+                image.save(temp_file, format="JPEG", quality=THUMBNAIL_QUALITY, optimize=True)
+                temp_path = temp_file.name
+            os.replace(temp_path, path)
+    finally:
+        pdf.close()
+    return paths
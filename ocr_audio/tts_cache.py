@@ -0,0 +1,25 @@
+import hashlib
+
+from ocr_audio.disk_cache import DiskCache
+from ocr_audio.text_chunking import normalize_text
+
+# Only MP3 segments can be joined at frame level, so that is what we request
+AUDIO_FORMAT = "mp3"
+
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+
+# Cache key for synthesized audio: normalized text hash, voice, model and format
+def make_audio_key(text, voice, model, audio_format=AUDIO_FORMAT):
+    text_hash = hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+    return hashlib.sha256(f"{text_hash}|{voice}|{model}|{audio_format}".encode("utf-8")).hexdigest()
+
+
+# Persistent cache of synthesized MP3 audio, for whole texts and for the
+# individual chunks they are split into, with LRU eviction past max_bytes
+class TTSCache(DiskCache):
+    FILENAME = "tts_cache.sqlite"
+    TABLE = "tts_cache"
+
+    def __init__(self, folder_path, max_bytes=DEFAULT_MAX_BYTES):
+        super().__init__(folder_path, max_bytes)
@@ -0,0 +1,298 @@
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from ocr_audio.text_chunking import split_stable, split_text
+from ocr_audio.tts_cache import AUDIO_FORMAT, make_audio_key
+
+# OpenAI's TTS endpoint and model
+TTS_URL = "https://api.openai.com/v1/audio/speech"
+TTS_MODEL = "tts-1"
+
+# The speech endpoint accepts at most 4096 characters per request
+MAX_INPUT_CHARS = 4096
+
+# Paragraphs are grouped into chunks of roughly this size
+TARGET_CHUNK_CHARS = 1000
+
+DEFAULT_TTS_WORKERS = 4
+
+# In streaming mode the first chunk is kept short so playback starts quickly
+FIRST_CHUNK_CHARS = 300
+STREAM_CHUNK_BYTES = 16 * 1024
+
+
+# Connections one synthesis call can hold at once: its parallel workers plus,
+# when streaming, the first chunk read on the calling thread
+def max_connections(max_workers=DEFAULT_TTS_WORKERS):
+    return max_workers + 1
+
+
+class TTSError(Exception):
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+# Stable chunks with the first one cut down so playback can start quickly
+def split_for_streaming(text):
+    chunks = split_stable(text, TARGET_CHUNK_CHARS, MAX_INPUT_CHARS)
+    if not chunks:
+        return chunks
+    head = split_text(chunks[0], FIRST_CHUNK_CHARS)
+    first = [head[0], " ".join(head[1:])] if len(head) > 1 else head
+    return first + chunks[1:]
+
+
+def _post_speech(text, api_key, voice, model, http, stream=False):
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json"
+    }
+    data = {
+        "model": model,
+        "input": text,
+        "voice": voice,
+        "response_format": AUDIO_FORMAT
+    }
+    response = (http or requests).post(TTS_URL, headers=headers, json=data, stream=stream)
+    if response.status_code != 200:
+        raise TTSError(f"OpenAI TTS failed: {response.status_code} - {response.text}", response.status_code)
+    return response
+
+
+# Synthesize one chunk with OpenAI TTS and return the MP3 bytes, going
+# through the chunk-level cache when one is given
+def synthesize_chunk(text, api_key, voice="alloy", model=TTS_MODEL, http=None, cache=None):
+    key = make_audio_key(text, voice, model) if cache is not None else None
+    if key:
+        audio = cache.get(key)
+        if audio is not None:
+            return audio
+    audio = _post_speech(text, api_key, voice, model, http).content
+    if key:
+        cache.put(key, audio)
+    return audio
+
+
+# Yield the MP3 bytes of one chunk as they arrive from the API
+def stream_chunk(text, api_key, voice="alloy", model=TTS_MODEL, http=None, chunk_bytes=STREAM_CHUNK_BYTES):
+    response = _post_speech(text, api_key, voice, model, http, stream=True)
+    try:
+        for data in response.iter_content(chunk_size=chunk_bytes):
+            if data:
+                yield data
+    finally:
+        response.close()
+
+
+# Synthesize text of any length: split it into chunks, synthesize them
+# concurrently and join the MP3 segments in order. With a cache, a repeated
+# text is returned whole and an edited one only re-synthesizes the chunks
+# that changed.
+def synthesize(text, api_key, voice="alloy", model=TTS_MODEL, max_workers=DEFAULT_TTS_WORKERS, http=None, cache=None,
+               on_progress=None):
+    text_key = make_audio_key(text, voice, model) if cache is not None else None
+    if text_key:
+        audio = cache.get(text_key)
+        if audio is not None:
+            return audio
+
+    chunks = split_stable(text, TARGET_CHUNK_CHARS, MAX_INPUT_CHARS)
+    if not chunks:
+        raise TTSError("No text to synthesize")
+    if len(chunks) == 1:
+        audio = synthesize_chunk(chunks[0], api_key, voice, model, http, cache)
+    else:
+        # on_progress(done, total) runs after each chunk; if it raises (e.g. a
+        # cancelled job), chunks not yet started are dropped
+        executor = ThreadPoolExecutor(max_workers=min(max_workers, len(chunks)))
+        try:
+            futures = [executor.submit(synthesize_chunk, chunk, api_key, voice, model, http, cache) for chunk in chunks]
+            segments = []
+            for future in futures:
+                segments.append(future.result())
+                if on_progress:
+                    on_progress(len(segments), len(chunks))
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+        audio = concat_mp3(segments)
+
+    if text_key:
+        cache.put(text_key, audio)
+    return audio
+
+
+# Streaming synthesis: the short first chunk is streamed straight into
+# output_path while the remaining chunks are synthesized in parallel and
+# appended in order. Yields (chunk index, chunk count, chunk MP3 bytes) as
+# soon as each chunk is playable.
+def synthesize_stream(text, api_key, output_path, voice="alloy", model=TTS_MODEL, max_workers=DEFAULT_TTS_WORKERS, http=None, cache=None):
+    text_key = make_audio_key(text, voice, model) if cache is not None else None
+    audio = cache.get(text_key) if text_key else None
+    if audio is not None:
+        with open(output_path, "wb") as output_file:
+            output_file.write(audio)
+        yield 0, 1, audio
+        return
+
+    chunks = split_for_streaming(text)
+    if not chunks:
+        raise TTSError("No text to synthesize")
+
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(chunks) - 1)))
+    try:
+        futures = [executor.submit(synthesize_chunk, chunk, api_key, voice, model, http, cache) for chunk in chunks[1:]]
+        with open(output_path, "wb") as output_file:
+            writer = SegmentWriter(output_file)
+            first_key = make_audio_key(chunks[0], voice, model) if cache is not None else None
+            cached = cache.get(first_key) if first_key else None
+            if cached is not None:
+                writer.feed(cached)
+                segment = cached
+            else:
+                segment = bytearray()
+                for data in stream_chunk(chunks[0], api_key, voice, model, http):
+                    writer.feed(data)
+                    segment += data
+                segment = bytes(segment)
+                if first_key:
+                    cache.put(first_key, segment)
+            writer.close()
+            yield 0, len(chunks), segment
+
+            for idx, future in enumerate(futures, start=1):
+                segment = future.result()
+                writer = SegmentWriter(output_file)
+                writer.feed(segment)
+                writer.close()
+                yield idx, len(chunks), segment
+
+        if text_key:
+            with open(output_path, "rb") as output_file:
+                cache.put(text_key, output_file.read())
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+# MPEG audio bitrates in kbps, indexed by [version group][layer][bitrate index]
+BITRATES = {
+    "v1": {
+        1: [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+        2: [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+        3: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    },
+    "v2": {
+        1: [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+        2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+        3: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    },
+}
+SAMPLE_RATES = {3: [44100, 48000, 32000], 2: [22050, 24000, 16000], 0: [11025, 12000, 8000]}
+
+
+# Length in bytes of the MPEG audio frame starting at offset, or None if
+# there is no valid frame header there
+def frame_length(data, offset):
+    if offset + 4 > len(data) or data[offset] != 0xFF or (data[offset + 1] & 0xE0) != 0xE0:
+        return None
+    version = (data[offset + 1] >> 3) & 0x03
+    layer = 4 - ((data[offset + 1] >> 1) & 0x03)
+    bitrate_index = (data[offset + 2] >> 4) & 0x0F
+    sample_rate_index = (data[offset + 2] >> 2) & 0x03
+    padding = (data[offset + 2] >> 1) & 0x01
+    if version == 1 or layer == 4 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+
+    bitrate = BITRATES["v1" if version == 3 else "v2"][layer][bitrate_index] * 1000
+    sample_rate = SAMPLE_RATES[version][sample_rate_index]
+    if layer == 1:
+        return (12 * bitrate // sample_rate + padding) * 4
+    if layer == 3 and version != 3:
+        return 72 * bitrate // sample_rate + padding
+    return 144 * bitrate // sample_rate + padding
+
+
+# Size of a leading ID3v2 tag, or 0 when there is none
+def id3v2_length(data):
+    if data[:3] != b"ID3" or len(data) < 10:
+        return 0
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+    return 10 + size + (10 if data[5] & 0x10 else 0)
+
+
+# Offset of the first audio frame, skipping a Xing/Info/VBRI header frame
+# whose frame count would be wrong once segments are joined
+def first_audio_frame(data):
+    offset = 0
+    while offset < len(data) - 1 and frame_length(data, offset) is None:
+        offset += 1
+    length = frame_length(data, offset)
+    if length is None:
+        return 0
+    head = data[offset:offset + min(length, 64)]
+    if b"Xing" in head or b"Info" in head or b"VBRI" in head:
+        return offset + length
+    return offset
+
+
+# Appends one MP3 segment to a file as its bytes arrive, dropping the ID3
+# tags and Xing/Info frame so consecutive segments form one frame stream
+class SegmentWriter:
+    HEAD_BYTES = 16 * 1024
+    ID3V1_BYTES = 128
+
+    def __init__(self, output_file):
+        self.output_file = output_file
+        self.pending = bytearray()
+        self.skip = 0
+        self.started = False
+
+    def feed(self, data):
+        # Bytes still inside a large ID3v2 tag are dropped
+        if self.skip:
+            dropped = min(self.skip, len(data))
+            self.skip -= dropped
+            data = data[dropped:]
+        self.pending += data
+        if not self.started:
+            if len(self.pending) < self.HEAD_BYTES:
+                return
+            self._start()
+        # Hold back enough bytes for a possible ID3v1 trailer
+        if len(self.pending) > self.ID3V1_BYTES:
+            self.output_file.write(self.pending[:-self.ID3V1_BYTES])
+            del self.pending[:-self.ID3V1_BYTES]
+
+    def _start(self):
+        self.started = True
+        data = bytes(self.pending)
+        tag_length = id3v2_length(data)
+        if tag_length > len(data):
+            self.skip = tag_length - len(data)
+            self.pending = bytearray()
+            self.started = False
+            return
+        data = data[tag_length:]
+        self.pending = bytearray(data[first_audio_frame(data):])
+
+    def close(self):
+        if not self.started:
+            self._start()
+        tail = bytes(self.pending)
+        if len(tail) >= self.ID3V1_BYTES and tail[-self.ID3V1_BYTES:-self.ID3V1_BYTES + 3] == b"TAG":
+            tail = tail[:-self.ID3V1_BYTES]
+        self.output_file.write(tail)
+        self.output_file.flush()
+        self.pending = bytearray()
+
+
+# Join MP3 segments at frame level without re-encoding
+def concat_mp3(segments):
+    joined = io.BytesIO()
+    for segment in segments:
+        writer = SegmentWriter(joined)
+        writer.feed(segment)
+        writer.close()
+    return joined.getvalue()
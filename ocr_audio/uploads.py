@@ -0,0 +1,88 @@
+import base64
+import hashlib
+import os
+import tempfile
+
+# Uploaded files are spilled here once, named by their SHA-256
+SPILL_DIR = os.path.join(tempfile.gettempdir(), "ocr_audio_spill")
+
+# Read uploads in 1 MB chunks; base64 chunks must be a multiple of 3 bytes
+CHUNK_SIZE = 1024 * 1024
+BASE64_CHUNK_SIZE = 3 * 256 * 1024
+
+
+# Stream an uploaded file (any binary file object, e.g. Streamlit's
+# UploadedFile) to a content-addressed spill file without holding a copy of
+# it in memory. Returns (path, sha256 hex digest, size in bytes).
+def spill_upload(file_obj, file_name, spill_dir=SPILL_DIR):
+    os.makedirs(spill_dir, exist_ok=True)
+    if hasattr(file_obj, "seek"):
+        file_obj.seek(0)
+
+    digest = hashlib.sha256()
+    size = 0
+    with tempfile.NamedTemporaryFile(dir=spill_dir, delete=False, suffix=".part") as temp_file:
+        while True:
+            chunk = file_obj.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            temp_file.write(chunk)
+            size += len(chunk)
+        temp_path = temp_file.name
+
+    content_hash = digest.hexdigest()
+    extension = os.path.splitext(file_name)[1].lower()
+    spill_path = os.path.join(spill_dir, f"{content_hash}{extension}")
+    if os.path.exists(spill_path):
+        os.remove(temp_path)
+    else:
+        os.replace(temp_path, spill_path)
+    return spill_path, content_hash, size
+
+
+# Build a base64 data URI from a file, encoding it chunk by chunk
+def file_to_data_uri(file_path, mime_type):
+    parts = [f"data:{mime_type};base64,"]
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(BASE64_CHUNK_SIZE), b""):
+            parts.append(base64.b64encode(chunk).decode("utf-8"))
+    return "".join(parts)
+
+
+# Stream a spill file to Mistral's file endpoint and return (signed URL, file id)
+def upload_for_ocr(client, file_path, file_name):
+    with open(file_path, "rb") as f:
+        uploaded = client.files.upload(file={"file_name": file_name, "content": f}, purpose="ocr")
+    signed_url = client.files.get_signed_url(file_id=uploaded.id)
+    return signed_url.url, uploaded.id
+
+
+# Mistral document payload for a local file. Uses the file-upload endpoint
+# when possible and falls back to an inline data URI. Returns
+# (document, uploaded file id or None).
+def prepare_local_document(client, file_path, file_name, mime_type, use_upload=True):
+    file_id = None
+    url = None
+    if use_upload:
+        try:
+            url, file_id = upload_for_ocr(client, file_path, file_name)
+        except Exception:
+            url = None
+    if url is None:
+        url = file_to_data_uri(file_path, mime_type)
+
+    if mime_type == "application/pdf":
+        return {"type": "document_url", "document_url": url}, file_id
+    return {"type": "image_url", "image_url": url}, file_id
+
+
+# Remove a file from Mistral storage once it has been processed
+def delete_uploaded_file(client, file_id):
+    if not file_id:
+        return
+    try:
+        client.files.delete(file_id=file_id)
+    except Exception:
+        pass
+
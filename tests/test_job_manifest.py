@@ -0,0 +1,59 @@
+import os
+
+from ocr_audio.job_manifest import JobManifest
+
+
+def artifact(tmp_path, name):
+    path = tmp_path / name
+    path.write_text("text", encoding="utf-8")
+    return str(path)
+
+
+def test_only_finished_stages_with_artifacts_on_disk_are_complete(tmp_path):
+    manifest = JobManifest(str(tmp_path))
+    manifest.start("running", "ocr")
+    manifest.fail("failed", "ocr", "boom")
+    manifest.finish("done", "ocr", artifact(tmp_path, "done.txt"))
+    deleted = artifact(tmp_path, "deleted.txt")
+    manifest.finish("deleted", "ocr", deleted)
+    os.remove(deleted)
+
+    assert manifest.completed_path("running", "ocr") is None
+    assert manifest.completed_path("failed", "ocr") is None
+    assert manifest.completed_path("unknown", "ocr") is None
+    assert manifest.completed_path("deleted", "ocr") is None
+    assert manifest.completed_path("done", "ocr") == str(tmp_path / "done.txt")
+    assert manifest.completed_path("done", "summary") is None
+
+
+def test_engine_filter_redoes_fallback_output(tmp_path):
+    manifest = JobManifest(str(tmp_path))
+    manifest.finish("mistral", "ocr", artifact(tmp_path, "a.txt"), engine="mistral")
+    manifest.finish("fallback", "ocr", artifact(tmp_path, "b.txt"), engine="tesseract")
+    manifest.finish("untagged", "ocr", artifact(tmp_path, "c.txt"))
+
+    assert manifest.completed_path("fallback", "ocr") == str(tmp_path / "b.txt")
+    assert manifest.completed_path("fallback", "ocr", engines=("mistral",)) is None
+    assert manifest.completed_path("mistral", "ocr", engines=("mistral", "cache")) == str(tmp_path / "a.txt")
+    assert manifest.completed_path("untagged", "ocr", engines=("mistral",)) == str(tmp_path / "c.txt")
+
+
+def test_completed_paths_looks_up_many_documents(tmp_path, monkeypatch):
+    monkeypatch.setattr("ocr_audio.job_manifest.KEYS_PER_QUERY", 3)
+    manifest = JobManifest(str(tmp_path))
+    keys = [f"doc{idx}" for idx in range(8)]
+    for key in keys[::2]:
+        manifest.finish(key, "ocr", artifact(tmp_path, f"{key}.txt"), engine="mistral")
+
+    paths = manifest.completed_paths(keys, "ocr", engines=("mistral",))
+    assert list(paths) == keys
+    assert [key for key, path in paths.items() if path] == keys[::2]
+
+
+def test_last_batch_only_returns_batches_of_the_same_origin(tmp_path):
+    manifest = JobManifest(str(tmp_path))
+    assert manifest.last_batch("app") is None
+    manifest.start_batch([{"key": "a"}], origin="app")
+    manifest.start_batch([{"label": "cli"}], origin="pipeline")
+    assert manifest.last_batch("app")[1] == [{"key": "a"}]
+    assert manifest.last_batch("pipeline")[1] == [{"label": "cli"}]
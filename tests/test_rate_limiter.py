@@ -0,0 +1,102 @@
+import pytest
+
+from ocr_audio import rate_limiter
+from ocr_audio.rate_limiter import RateLimiter
+
+
+# Stand-in for the time module whose sleep() advances a virtual clock
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class APIError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+# fn failing with the given errors in turn, then returning "ok"
+def failing(*errors):
+    calls = []
+
+    def fn():
+        calls.append(len(calls))
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return "ok"
+    return fn, calls
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter, "time", clock)
+    return clock
+
+
+def test_server_error_is_retried_after_the_requested_wait(clock):
+    limiter = RateLimiter(requests_per_second=100)
+    fn, calls = failing(APIError(503, {"retry-after": "2"}))
+    assert limiter.call(fn) == "ok"
+    assert len(calls) == 2
+    assert clock.sleeps == [2.0]
+    assert limiter.stats["retries"] == 1
+    assert limiter.stats["server_errors"] == 1
+
+
+def test_throttling_waits_for_retry_after_ms_and_halves_the_rate(clock):
+    limiter = RateLimiter(requests_per_second=100)
+    fn, calls = failing(APIError(429, {"retry-after-ms": "1500"}))
+    assert limiter.call(fn) == "ok"
+    assert len(calls) == 2
+    assert sum(clock.sleeps) == pytest.approx(1.5)
+    assert limiter.stats["throttled"] == 1
+    # Halved on the 429, then nudged back up by 10% of the max on success
+    assert limiter.request_bucket.rate == pytest.approx(60)
+
+
+def test_retry_after_is_capped_at_max_delay(clock):
+    limiter = RateLimiter(requests_per_second=100, max_delay=5)
+    fn, _ = failing(APIError(503, {"retry-after": "120"}))
+    limiter.call(fn)
+    assert clock.sleeps == [5]
+
+
+def test_backoff_is_used_without_retry_after(clock):
+    limiter = RateLimiter(requests_per_second=100, base_delay=1.0)
+    fn, _ = failing(APIError(500), APIError(502))
+    assert limiter.call(fn) == "ok"
+    assert 0.5 <= clock.sleeps[0] <= 1.0
+    assert 1.0 <= clock.sleeps[1] <= 2.0
+
+
+def test_client_errors_are_not_retried(clock):
+    limiter = RateLimiter(requests_per_second=100)
+    fn, calls = failing(APIError(400))
+    with pytest.raises(APIError):
+        limiter.call(fn)
+    assert len(calls) == 1
+    assert limiter.stats["failures"] == 1
+
+
+def test_gives_up_after_max_retries(clock):
+    limiter = RateLimiter(requests_per_second=100, max_retries=2)
+    fn, calls = failing(*[APIError(503, {"retry-after": "0"})] * 5)
+    with pytest.raises(APIError):
+        limiter.call(fn)
+    assert len(calls) == 3
+    assert limiter.stats["retries"] == 2
+    assert limiter.in_flight == 0
@@ -0,0 +1,61 @@
+import os
+
+from ocr_audio.disk_cache import CACHE_DIRNAME
+from ocr_audio.retrieval import INDEX_DIRNAME, MIN_RETRIEVAL_CHARS, HashingEmbedder, VectorIndex, retrieve_context
+
+
+def test_search_returns_most_similar_chunks_first():
+    index = VectorIndex(["a", "b", "c"], [[1, 0, 0], [0, 1, 0], [0.8, 0.6, 0]])
+    assert index.search([1, 0, 0], k=2) == [0, 2]
+    assert index.search([0, 2, 0], k=1) == [1]
+
+
+def test_search_caps_k_and_handles_empty_index():
+    index = VectorIndex(["a", "b"], [[1, 0], [0, 1]])
+    assert sorted(index.search([1, 1], k=10)) == [0, 1]
+    assert VectorIndex([], []).search([1, 0]) == []
+
+
+def test_index_round_trips_through_disk(tmp_path):
+    index = VectorIndex(["first", "second"], [[1, 0], [0, 3]])
+    file_path = str(tmp_path / "index.npz")
+    index.save(file_path)
+    loaded = VectorIndex.load(file_path)
+    assert loaded.chunks == ["first", "second"]
+    assert loaded.search([0, 1], k=1) == [1]
+
+
+def test_short_text_is_returned_whole(tmp_path):
+    text = "A short note about apples."
+    assert retrieve_context(text, "apples?", HashingEmbedder(), str(tmp_path)) == text
+
+
+def long_text():
+    topics = ["apples grow in orchards", "trains run on rails", "volcanoes erupt lava", "bees make honey"]
+    paragraphs = [f"Paragraph {idx} is about {topics[idx % len(topics)]}. " * 6 for idx in range(40)]
+    text = "\n\n".join(paragraphs)
+    assert len(text) > MIN_RETRIEVAL_CHARS
+    return text
+
+
+def test_long_text_is_answered_from_relevant_chunks_in_document_order(tmp_path):
+    text = long_text()
+    context = retrieve_context(text, "How do volcanoes erupt lava?", HashingEmbedder(), str(tmp_path), k=2)
+    assert len(context) < len(text)
+    assert "volcanoes erupt lava" in context
+    chunks = context.split("\n\n")
+    assert sorted(chunks, key=text.index) == chunks
+    assert os.listdir(tmp_path / CACHE_DIRNAME / INDEX_DIRNAME)
+
+
+def test_given_question_vector_is_used_instead_of_embedding_the_question(tmp_path):
+    text = long_text()
+    embedder = HashingEmbedder()
+    question_vector = embedder.embed_query("bees make honey")
+    context = retrieve_context(text, "unrelated words", embedder, str(tmp_path), k=1, question_vector=question_vector)
+    assert "bees make honey" in context
+
+
+def test_blank_long_text_gives_empty_context(tmp_path):
+    text = " \n" * MIN_RETRIEVAL_CHARS
+    assert retrieve_context(text, "anything?", HashingEmbedder(), str(tmp_path)) == ""
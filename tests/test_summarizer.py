@@ -0,0 +1,30 @@
+import pytest
+
+from ocr_audio import summarizer
+from ocr_audio.summarizer import pack_groups
+
+
+# One token per character, so group sizes do not depend on tiktoken
+@pytest.fixture(autouse=True)
+def char_tokens(monkeypatch):
+    monkeypatch.setattr(summarizer, "count_tokens", lambda text, model=None: len(text))
+
+
+def test_texts_are_grouped_up_to_max_tokens():
+    texts = ["a" * 4, "b" * 4, "c" * 4, "d" * 4, "e" * 4, "f" * 4]
+    assert pack_groups(texts, 10) == [texts[0:2], texts[2:4], texts[4:6]]
+
+
+def test_groups_hold_at_least_two_texts_even_when_over_budget():
+    texts = ["a" * 50, "b" * 50, "c" * 50, "d" * 50]
+    assert pack_groups(texts, 10) == [texts[0:2], texts[2:4]]
+
+
+def test_trailing_single_text_joins_the_previous_group():
+    texts = ["a" * 5, "b" * 5, "c" * 5]
+    assert pack_groups(texts, 10) == [texts]
+
+
+def test_single_text_stays_alone():
+    assert pack_groups(["only"], 10) == [["only"]]
+    assert pack_groups([], 10) == []
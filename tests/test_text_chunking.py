@@ -0,0 +1,45 @@
+import random
+
+from ocr_audio.text_chunking import split_stable
+
+TARGET_CHARS = 400
+MAX_CHARS = 1000
+
+
+def make_text(paragraph_count=60, seed=7):
+    rng = random.Random(seed)
+    words = ["alpha", "beta", "gamma", "delta", "epsilon", "zeta", "eta", "theta", "iota", "kappa"]
+    paragraphs = []
+    for idx in range(paragraph_count):
+        sentence = " ".join(rng.choice(words) for _ in range(rng.randint(10, 40)))
+        paragraphs.append(f"Paragraph {idx}: {sentence}.")
+    return paragraphs
+
+
+def test_chunks_cover_the_text_and_respect_max_chars():
+    paragraphs = make_text()
+    chunks = split_stable("\n\n".join(paragraphs), TARGET_CHARS, MAX_CHARS)
+    assert all(len(chunk) <= MAX_CHARS for chunk in chunks)
+    assert "\n\n".join(chunks) == "\n\n".join(paragraphs)
+
+
+def test_whitespace_only_edits_do_not_change_chunks():
+    paragraphs = make_text()
+    text = "\n\n".join(paragraphs)
+    messy = "\n\n\n".join(f"  {paragraph.replace(' ', '  ')}\t" for paragraph in paragraphs)
+    assert split_stable(messy, TARGET_CHARS, MAX_CHARS) == split_stable(text, TARGET_CHARS, MAX_CHARS)
+
+
+def test_editing_one_paragraph_only_changes_the_chunks_around_it():
+    paragraphs = make_text()
+    before = split_stable("\n\n".join(paragraphs), TARGET_CHARS, MAX_CHARS)
+    paragraphs[30] = paragraphs[30].replace("Paragraph 30:", "Paragraph 30 (edited):")
+    after = split_stable("\n\n".join(paragraphs), TARGET_CHARS, MAX_CHARS)
+
+    changed = set(after) - set(before)
+    assert 1 <= len(changed) <= 2
+    assert any("Paragraph 30 (edited):" in chunk for chunk in changed)
+    # Chunks before the edit are untouched and later ones re-synchronise
+    edited_at = next(idx for idx, chunk in enumerate(after) if chunk in changed)
+    assert after[:edited_at] == before[:edited_at]
+    assert after[-5:] == before[-5:]
@@ -0,0 +1,49 @@
+import io
+
+from ocr_audio.tts_engine import SegmentWriter, concat_mp3
+
+# MPEG-1 Layer III, 128 kbps, 44.1 kHz: 417-byte frames
+FRAME_HEADER = b"\xff\xfb\x90\x00"
+FRAME_BYTES = 417
+
+
+def audio_frame(fill):
+    return FRAME_HEADER + bytes([fill]) * (FRAME_BYTES - len(FRAME_HEADER))
+
+
+def xing_frame():
+    body = bytes(32) + b"Xing" + bytes(FRAME_BYTES - len(FRAME_HEADER) - 36)
+    return FRAME_HEADER + body
+
+
+def id3v2_tag(payload_size):
+    size = bytes([(payload_size >> shift) & 0x7F for shift in (21, 14, 7, 0)])
+    return b"ID3\x04\x00\x00" + size + b"\x00" * payload_size
+
+
+def id3v1_tag():
+    return b"TAG" + b"\x20" * 125
+
+
+def segment(fill, frames=3, tag_size=64):
+    return id3v2_tag(tag_size) + xing_frame() + b"".join(audio_frame(fill) for _ in range(frames)) + id3v1_tag()
+
+
+def test_concat_mp3_keeps_only_audio_frames():
+    joined = concat_mp3([segment(1), segment(2, frames=2)])
+    assert joined == b"".join([audio_frame(1)] * 3 + [audio_frame(2)] * 2)
+
+
+def test_concat_mp3_leaves_plain_frames_alone():
+    frames = audio_frame(5) + audio_frame(6)
+    assert concat_mp3([frames]) == frames
+
+
+def test_segment_writer_strips_tags_when_fed_in_small_pieces():
+    data = segment(3, frames=60, tag_size=20000)
+    output = io.BytesIO()
+    writer = SegmentWriter(output)
+    for start in range(0, len(data), 1000):
+        writer.feed(data[start:start + 1000])
+    writer.close()
+    assert output.getvalue() == audio_frame(3) * 60